@@ -47,6 +47,13 @@ def parse_arguments():
                         default="info")
 
     parser.add_argument("-i", "--input", help="perform tests on input file")
+    parser.add_argument("--blocks", help="test every block of 20000 bits of "
+                        "the input file instead of only the first one, in "
+                        "parallel, and report the pass rate of every test",
+                        action="store_true")
+    parser.add_argument("--block_step", help="bits between the starts of two "
+                        "blocks of the input file, less than 20000 makes them "
+                        "overlap", type=int, default=20000)
 
     parser.add_argument("-x", type=int, help="initial x in (a*x + c) mod m",
                         default=1)
@@ -71,12 +78,60 @@ def parse_arguments():
     parser.add_argument("--plot_spectral", help="plot X_{n+1} vs X_{n}",
                         action="store_true")
 
-    parser.add_argument("-j", help="number of parallel processes in runs test",
-                        type=int, default=4)
+    parser.add_argument("--poker_width", help="block width in bits for the "
+                        "poker test", type=int, choices=range(4, 17),
+                        default=4)
+
+    parser.add_argument("--fused", help="perform monobit, poker, runs and "
+                        "long runs test in one pass", action="store_true")
+
+    parser.add_argument("--fail_fast", help="perform the cheapest tests "
+                        "first and stop at the first failed one, the others "
+                        "are recorded as 'not run'", action="store_true")
+
+    parser.add_argument("--prefilter", help="don't test parameter sets whose "
+                        "period is too short for the sequence, they are "
+                        "recorded as 'not run'", action="store_true")
+
+    parser.add_argument("--batch", help="generate and test this many "
+                        "parameter sets with the same modulus at once",
+                        type=int, default=0)
+
+    parser.add_argument("--spectral_screen", help="in batch mode calculate "
+                        "v2 for the whole batch at once and perform the full "
+                        "spectral test only where v2 passes",
+                        action="store_true")
+
+    parser.add_argument("--spectral_engine", help="knuth: Knuth's search, "
+                        "fine up to about 5 dimensions, lll: LLL reduction "
+                        "and enumeration for many dimensions",
+                        choices=["knuth", "lll"], default="knuth")
+    parser.add_argument("--spectral_dimensions", help="highest dimension of "
+                        "the spectral test", type=int, default=5)
+    parser.add_argument("--spectral_budget", help="time budget in seconds "
+                        "for the spectral test of one parameter set with the "
+                        "lll engine, after it v_t is only an upper bound",
+                        type=float)
+
+    parser.add_argument("--parallel_sweep", help="spread chunks of parameter "
+                        "sets across the worker processes, each one is "
+                        "generated and tested in a single worker",
+                        action="store_true")
+    parser.add_argument("--chunk", help="number of parameter sets per chunk "
+                        "in the parallel sweep", type=int, default=16)
+
+    parser.add_argument("-j", help="number of worker processes shared by "
+                        "all tests of the sweep", type=int, default=4)
     parser.add_argument("-t", "--test", help="perform unittests and exit",
                         action="store_true")
 
     args = parser.parse_args()
+
+    if args.blocks and not args.input:
+        parser.error("--blocks needs an input file")
+    if args.block_step < 1:
+        parser.error("--block_step must be positive")
+
     return args
 
 def perform_unittests():
@@ -125,13 +180,13 @@ def main():
 
     # if we have a random data file present we can parse that
     if args.input:
-        binary_sequence = parse_file.parse_from_file(args.input)
+        if not args.blocks:
+            binary_sequence = parse_file.parse_from_file(args.input)
         cl.info("Testing random numbers from file {}".format(args.input))
     else:
         cl.info("Starting LCG testing")
 
-    cl.verbose("Using {} processes in parallel (in (long) runs test)".format(
-        args.j))
+    cl.verbose("Using {} worker processes for the tests".format(args.j))
 
     if not args.force:
         cl.info("Skipping parameters where the results are already calculated")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Run the statistical tests on many sequences at once.
+
+Every sequence is one row of a 2-D array of bits and every test works along
+axis 1, so the interpreter overhead is paid once per batch instead of once per
+sequence. The verdicts are the same as from the single tests.
+
+"""
+import numpy as np
+
+import modules.lcg as lcg
+import modules.statistical_test_monobit as monobit
+import modules.statistical_test_poker as poker
+import modules.statistical_test_runs as runs
+import modules.statistical_test_autocorrelation as ac
+
+from util.logging.logger import CoreLog as cl
+
+# number of rows that go through the autocorrelation FFT together
+AUTOCORRELATION_ROWS = 64
+
+def batch_sequences(parameter_list, length=20000):
+    """
+    Generate the binary sequences for a list of parameter sets with the same
+    modulus.
+
+    Returns the unpacked bits, one row of `length` bits per parameter set.
+
+    """
+    m = parameter_list[0]["m"]
+    if any(parameters["m"] != m for parameters in parameter_list):
+        raise ValueError("All parameter sets in a batch need the same modulus")
+
+    padding = max(1, (m - 1).bit_length())
+    count = -(-length // padding)
+
+    cl.verbose("Generating {} pseudorandom sequences for modulus {}".format(
+        len(parameter_list), m))
+
+    nums = lcg.lcg_many(
+        [parameters["x0"] for parameters in parameter_list],
+        [parameters["a"] for parameters in parameter_list],
+        [parameters["c"] for parameters in parameter_list],
+        m, count)
+
+    # 64 bits per number, most significant bit first, keep the low `padding`
+    nums = np.ascontiguousarray(nums, dtype=">u8")
+    bits = np.unpackbits(nums.view(np.uint8).reshape(len(nums), count, 8),
+                         axis=2)
+    bits = bits[:, :, 64-padding:].reshape(len(nums), count * padding)
+
+    return np.ascontiguousarray(bits[:, :length])
+
+def batch_monobit(bits):
+    """
+    Monobit test for every row.
+
+    """
+    ratio = bits.sum(axis=1, dtype=np.int64) / bits.shape[1]
+
+    lower_bound = monobit.LOWER_BOUND/20000
+    upper_bound = monobit.UPPER_BOUND/20000
+
+    return (lower_bound < ratio) & (ratio < upper_bound)
+
+def batch_poker(bits, m=4):
+    """
+    Poker test with blocks of m bits for every row.
+
+    """
+    rows = bits.shape[0]
+    k = bits.shape[1] // m
+
+    blocks = bits[:, :k*m].reshape(rows, k, m).astype(np.int64)
+    values = blocks @ (1 << np.arange(m - 1, -1, -1))
+
+    # one histogram of 2**m entries per row
+    offsets = (np.arange(rows) << m)[:, np.newaxis]
+    f = np.bincount((values + offsets).reshape(-1),
+                    minlength=rows << m).reshape(rows, 2**m)
+
+    res = 2**m/k * np.sum(f*f, axis=1) - k
+
+    lower_bound, upper_bound = poker.POKER_BOUNDS[m]
+
+    return (lower_bound < res) & (res < upper_bound)
+
+def batch_run_lengths(bits):
+    """
+    Run-length encoding of every row.
+
+    Returns row, bit value and length of every run, and masks for the first
+    and the last run of every row.
+
+    """
+    rows, length = bits.shape
+    flat = bits.reshape(-1)
+
+    # a new run starts wherever the bit changes and at the start of every row
+    new_run = np.ones(flat.shape, dtype=bool)
+    new_run[1:] = flat[1:] != flat[:-1]
+    new_run[::length] = True
+
+    starts = np.flatnonzero(new_run)
+    lengths = np.diff(np.append(starts, len(flat)))
+
+    first = (starts % length) == 0
+    last = np.append(first[1:], True)
+
+    return starts // length, flat[starts], lengths, first, last
+
+def batch_runs(bits):
+    """
+    Runs and long runs test for every row.
+
+    Returns the verdicts of both tests and the longest runs of zeros and ones
+    of every row.
+
+    """
+    rows = bits.shape[0]
+    row, values, lengths, first, last = batch_run_lengths(bits)
+    values = values.astype(np.int64)
+
+    # histogram of the enclosed runs, everything from LONG_RUN_LENGTH on is
+    # collected in the last bin
+    width = runs.LONG_RUN_LENGTH + 1
+    enclosed = ~first & ~last
+    index = ((row * 2 + values) * width
+             + np.minimum(lengths, runs.LONG_RUN_LENGTH))[enclosed]
+    histogram = np.bincount(index, minlength=rows * 2 * width)
+    histogram = histogram.reshape(rows, 2, width)
+
+    runs_pass = np.ones(rows, dtype=bool)
+    for length, lower, upper in runs.RUNS_INTERVALS:
+        if length == 6:
+            counts = histogram[:, :, 6:runs.LONG_RUN_LENGTH].sum(axis=2)
+        else:
+            counts = histogram[:, :, length]
+        runs_pass &= np.all((lower <= counts) & (counts <= upper), axis=1)
+
+    # longest runs, including the first and the last run of every row
+    longest = np.zeros((rows, 2), dtype=np.int64)
+    for value in [0, 1]:
+        mask = values == value
+        value_rows = row[mask]
+        if len(value_rows) == 0:
+            continue
+        unique_rows, row_starts = np.unique(value_rows, return_index=True)
+        longest[unique_rows, value] = np.maximum.reduceat(
+            lengths[mask], row_starts)
+
+    long_runs_pass = longest.max(axis=1) < runs.LONG_RUN_LENGTH
+
+    return runs_pass, long_runs_pass, longest
+
+def batch_autocorrelation(bits):
+    """
+    Autocorrelation test for every row.
+
+    """
+    max_tau = int(bits.shape[1] / 4)
+
+    res = np.zeros(bits.shape[0], dtype=bool)
+    for start in range(0, bits.shape[0], AUTOCORRELATION_ROWS):
+        ctau = ac.xor_sums(bits[start:start+AUTOCORRELATION_ROWS], max_tau)
+        res[start:start+AUTOCORRELATION_ROWS] = np.all(
+            (ac.LOWER_BOUND < ctau) & (ctau < ac.UPPER_BOUND), axis=1)
+
+    return res
+
+def batch_test(bits, poker_width=4):
+    """
+    Perform all statistical tests on every row of bits.
+
+    Returns a dictionary with one array of verdicts per test, with the same
+    keys as run_tests.sequence_test(). "longest_runs" holds the longest run of
+    zeros and of ones per row.
+
+    """
+    runs_pass, long_runs_pass, longest = batch_runs(bits)
+
+    results = dict()
+    results["monobit"] = batch_monobit(bits)
+    results["poker"] = batch_poker(bits, poker_width)
+    results["runs"] = runs_pass
+    results["long_runs"] = long_runs_pass
+    results["longest_runs"] = longest
+    results["autocorrelation"] = batch_autocorrelation(bits)
+
+    return results
+
+def batch_results(parameter_list, poker_width=4, length=20000):
+    """
+    Generate and test the sequences for a list of parameter sets with the
+    same modulus.
+
+    Returns one result dictionary per parameter set, like sequence_test()
+    before the spectral test.
+
+    """
+    bits = batch_sequences(parameter_list, length)
+    results = batch_test(bits, poker_width)
+
+    result_list = list()
+    for i in range(len(parameter_list)):
+        res = dict()
+        res["monobit"] = bool(results["monobit"][i])
+        res["poker"] = bool(results["poker"][i])
+        res["runs"] = bool(results["runs"][i])
+        res["long_runs"] = bool(results["long_runs"][i])
+        res["longest_runs"] = {
+            "zeros": int(results["longest_runs"][i, 0]),
+            "ones": int(results["longest_runs"][i, 1]),
+        }
+        res["autocorrelation"] = bool(results["autocorrelation"][i])
+        result_list.append(res)
+
+    return result_list
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+A compact container for binary sequences.
+
+"""
+import numpy as np
+
+class BitSequence:
+    """
+    A sequence of bits, packed eight bits to a byte.
+
+    The bits are stored most significant bit first, so they are in the same
+    order as in a string of '0' and '1' characters. Bits in the last byte that
+    are beyond the length of the sequence are undefined.
+
+    """
+    def __init__(self, packed, length):
+        """
+        Wrap a packed uint8 buffer that holds `length` bits.
+
+        """
+        packed = np.asarray(packed, dtype=np.uint8)
+
+        if length < 0 or len(packed) * 8 < length:
+            raise ValueError("Buffer of {} bytes can not hold {} bits".format(
+                len(packed), length))
+
+        self._packed = packed[:(length + 7) // 8]
+        self._length = length
+
+    @classmethod
+    def from_string(cls, string):
+        """
+        Create a bit sequence from a string of '0' and '1' characters.
+
+        """
+        bits = np.frombuffer(string.encode("ascii"), dtype=np.uint8) - ord("0")
+
+        if np.any(bits > 1):
+            raise ValueError("Binary sequence must only contain 0 and 1")
+
+        return cls.from_bits(bits)
+
+    @classmethod
+    def from_bits(cls, bits):
+        """
+        Create a bit sequence from an array with one 0 or 1 per entry.
+
+        """
+        return cls(np.packbits(np.asarray(bits, dtype=np.uint8)), len(bits))
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return (self.bits() + ord("0")).tobytes().decode("ascii")
+
+    def __repr__(self):
+        return "BitSequence({} bits)".format(self._length)
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            other = BitSequence.from_string(other)
+        if not isinstance(other, BitSequence):
+            return NotImplemented
+        return (
+            len(self) == len(other)
+            and
+            np.array_equal(self.bits(), other.bits())
+        )
+
+    def __getitem__(self, key):
+        """
+        Return a single bit or a slice of the sequence.
+
+        Slices that start on a byte boundary share the buffer with this
+        sequence, all others are copied.
+
+        """
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            stop = max(start, stop)
+
+            if step == 1 and start % 8 == 0:
+                return BitSequence(self._packed[start // 8:], stop - start)
+
+            return BitSequence.from_bits(self.bits()[start:stop:step])
+
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("Bit index out of range")
+
+        return int(self._packed[key // 8] >> (7 - key % 8)) & 1
+
+    @property
+    def packed(self):
+        """
+        The packed uint8 buffer (no copy).
+
+        """
+        return self._packed
+
+    @property
+    def words(self):
+        """
+        All complete 64 bit words of the sequence as big endian uint64 (no
+        copy).
+
+        """
+        n_words = self._length // 64
+        return self._packed[:8 * n_words].view(">u8")
+
+    def bits(self):
+        """
+        Return the unpacked sequence, one 0 or 1 per uint8 entry.
+
+        """
+        return np.unpackbits(self._packed, count=self._length)
+
+    def count_ones(self):
+        """
+        Count the set bits in the sequence.
+
+        """
+        full_bytes = self._length // 8
+        count = int(np.sum(_POPCOUNT[self._packed[:full_bytes]]))
+
+        rest = self._length % 8
+        if rest:
+            count += int(_POPCOUNT[self._packed[full_bytes] >> (8 - rest)])
+
+        return count
+
+# number of set bits for every byte value
+_POPCOUNT = np.unpackbits(
+    np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1)
+
+def as_bit_sequence(binary_sequence):
+    """
+    Turn a string of 0 and 1 or an array of bits into a BitSequence.
+
+    BitSequences are returned as they are.
+
+    """
+    if isinstance(binary_sequence, BitSequence):
+        return binary_sequence
+
+    if isinstance(binary_sequence, str):
+        return BitSequence.from_string(binary_sequence)
+
+    return BitSequence.from_bits(binary_sequence)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Worker pool shared by all tests of a parameter sweep.
+
+"""
+import collections
+import multiprocessing
+import time
+
+from util.logging.logger import CoreLog as cl
+
+# number of tasks per worker process that imap() keeps in flight
+QUEUE_DEPTH = 2
+
+class SweepExecutor:
+    """
+    Runs work for the tests, in a pool of worker processes.
+
+    The pool is started once for the whole sweep, so the processes are not
+    spawned again for every test or parameter set. With a single process no
+    pool is started and all work runs right away in this process.
+
+    The pool is meant for coarse work, like the spectral test or whole chunks
+    of parameter sets. Every task is pickled and sent to a worker, which
+    costs more than the quick statistical tests on one sequence.
+
+    The time it takes to start the pool and the time the workers spend
+    computing are recorded and reported when the executor is closed.
+
+    """
+    def __init__(self, processes=1):
+        """
+        Start the worker pool.
+
+        """
+        self.processes = max(1, processes)
+        self.startup_time = 0.0
+        self.compute_time = 0.0
+        self.task_count = 0
+
+        self._start = time.perf_counter()
+        self._pool = None
+
+        if self.processes > 1:
+            self._pool = multiprocessing.Pool(self.processes)
+            self.startup_time = time.perf_counter() - self._start
+            cl.verbose("Started {} worker processes in {:.3f} s".format(
+                self.processes, self.startup_time))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, function, *args):
+        """
+        Submit function(*args) and return a handle, its get() method returns
+        the result.
+
+        """
+        if self._pool is None:
+            seconds, value = _timed_call(function, args)
+            self._record(seconds)
+            return _Done(value)
+
+        return _Result(self, self._pool.apply_async(_timed_call,
+                                                    (function, args)))
+
+    def imap(self, function, args_iterable):
+        """
+        Call function(*args) for every args in args_iterable and yield the
+        results in order.
+
+        Only a few tasks per worker process are submitted ahead, so
+        args_iterable can be a long generator.
+
+        """
+        pending = collections.deque()
+
+        for args in args_iterable:
+            pending.append(self.submit(function, *args))
+
+            if len(pending) >= QUEUE_DEPTH * self.processes:
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+
+    def close(self):
+        """
+        Shut the worker pool down and report the timings.
+
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+            cl.info(self.report())
+
+    def report(self):
+        """
+        Return a summary of the start-up, the compute time and the overhead.
+
+        The overhead is the wall time minus the compute time per process, the
+        time the workers were not computing. That includes the start-up,
+        sending the work to the workers and back and waiting for new work.
+
+        """
+        wall_time = time.perf_counter() - self._start
+        overhead = max(0.0, wall_time - self.compute_time / self.processes)
+
+        if wall_time > 0:
+            ratio = "{:.1f} %".format(100 * overhead / wall_time)
+        else:
+            ratio = "n/a"
+
+        return ("Worker pool: start-up {:.3f} s, {} tasks with {:.3f} s "
+                "compute time in {:.3f} s wall time ({} processes), overhead "
+                "{:.3f} s ({} of wall time)".format(
+                    self.startup_time, self.task_count, self.compute_time,
+                    wall_time, self.processes, overhead, ratio))
+
+    def _record(self, seconds):
+        self.task_count += 1
+        self.compute_time += seconds
+
+class _Result:
+    """
+    Handle for submitted work.
+
+    """
+    def __init__(self, executor, async_result):
+        self._executor = executor
+        self._async_result = async_result
+        self._value = None
+        self._done = False
+
+    def get(self):
+        """
+        Wait for the work to finish and return its result.
+
+        """
+        if not self._done:
+            seconds, self._value = self._async_result.get()
+            self._executor._record(seconds)
+            self._done = True
+
+        return self._value
+
+class _Done:
+    """
+    Handle for work that already ran in this process.
+
+    """
+    def __init__(self, value):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+def _timed_call(function, args):
+    """
+    Call function(*args), return the compute time and the result.
+
+    """
+    start = time.perf_counter()
+    value = function(*args)
+    return time.perf_counter() - start, value
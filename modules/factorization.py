@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Prime factorization of the moduli of a sweep.
+
+"""
+import collections
+import math
+import random
+
+import numpy as np
+
+from modules.results_store import ResultsStore
+from util.logging.logger import CoreLog as cl
+
+# numbers per segment of the sieve
+SIEVE_SEGMENT = 2**16
+
+# number of sieved segments kept in memory, a sweep goes through the moduli in
+# order, so it only needs the segments of m - 1 and m
+SIEVE_SEGMENTS_KEPT = 2
+
+# the sieve needs all primes up to sqrt(hi), windows beyond this are not sieved
+SIEVE_MAX_NUMBER = 2**48
+
+# numbers below this are factorized by trial division alone
+TRIAL_DIVISION_LIMIT = 2**20
+
+# bases of the Miller-Rabin test, deterministic below 3.3 * 10**24
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# number of steps of Pollard's rho between two gcds
+RHO_BATCH = 128
+
+# number of factorizations kept in memory
+MEMORY_SIZE = 2**16
+
+# number of new factorizations that are written to disk together
+FLUSH_SIZE = 2**12
+
+class FactorizationService:
+    """
+    Prime factorizations, as tuples of (prime, exponent) pairs.
+
+    The numbers lo to hi (usually m - 1 and m for all moduli of a sweep) are
+    covered by a segmented sieve, which records the prime factors up to
+    sqrt(hi) of every number. A segment is sieved when the first number from
+    it comes up. Everything else is factorized with trial division and, for
+    big numbers, Miller-Rabin and Pollard's rho, so single moduli like
+    2**31 - 1 or 2**64 + 1 are fine as well.
+
+    Recently used factorizations are kept in memory, least recently used ones
+    are dropped first. With a path all of them are also stored on disk, in
+    groups of FLUSH_SIZE and when the service is closed, so the next sweep
+    over the same moduli does not have to factorize anything.
+
+    """
+    def __init__(self, lo=None, hi=None, path=None):
+        """
+        Set up the service for the window lo to hi, with the disk memo at
+        path (if given). The window has to start at 1 or later, 0 is divisible
+        by every prime.
+
+        """
+        if lo is not None and lo < 1:
+            raise ValueError("The sieve window has to start at 1 or later, "
+                             "not {}".format(lo))
+
+        self._memory = collections.OrderedDict()
+        self._new = dict()
+
+        self._lo = lo
+        self._hi = hi
+        if hi is not None and hi > SIEVE_MAX_NUMBER:
+            cl.verbose("Not sieving up to {}, the numbers are too "
+                       "big".format(hi))
+            self._lo = self._hi = None
+
+        self._primes = None
+        self._segments = collections.OrderedDict()
+
+        self._store = None
+        if path is not None:
+            self._store = ResultsStore(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Write the new factorizations to disk.
+
+        """
+        if self._store is not None:
+            self._flush()
+            self._store.close()
+            self._store = None
+
+    def factorize(self, n):
+        """
+        Prime factorization of n > 0.
+
+        """
+        n = int(n)
+        if n < 1:
+            raise ValueError("Can only factorize positive numbers, not {}".format(n))
+
+        if n in self._memory:
+            self._memory.move_to_end(n)
+            return self._memory[n]
+
+        if self._store is not None and (n,) in self._store:
+            factors = self._store.get((n,))
+            self._remember(n, factors)
+            return factors
+
+        if self._lo is not None and self._lo <= n <= self._hi:
+            factors = self._factorize_window(n)
+        else:
+            factors = _combine(_prime_factors(n))
+
+        self._remember(n, factors)
+
+        if self._store is not None:
+            self._new[n] = factors
+            if len(self._new) >= FLUSH_SIZE:
+                self._flush()
+
+        return factors
+
+    def _remember(self, n, factors):
+        self._memory[n] = factors
+
+        while len(self._memory) > MEMORY_SIZE:
+            self._memory.popitem(last=False)
+
+    def _flush(self):
+        """
+        Write the new factorizations to disk in one transaction.
+
+        """
+        if self._new:
+            cl.verbose("Storing {} new factorizations".format(len(self._new)))
+            self._store.put_many([((n,), factors)
+                                  for n, factors in self._new.items()])
+            self._new = dict()
+
+    def _factorize_window(self, n):
+        """
+        Factorize n from the window with the prime factors from the sieve.
+
+        """
+        if self._primes is None:
+            self._primes = small_primes(math.isqrt(self._hi))
+
+        start = self._lo + (n - self._lo) // SIEVE_SEGMENT * SIEVE_SEGMENT
+        if start not in self._segments:
+            end = min(start + SIEVE_SEGMENT - 1, self._hi)
+            self._segments[start] = segmented_factor_sieve(start, end,
+                                                           self._primes)
+            while len(self._segments) > SIEVE_SEGMENTS_KEPT:
+                self._segments.popitem(last=False)
+
+        table, counts = self._segments[start]
+        i = n - start
+
+        factors = list()
+        for p in table[i, :counts[i]].tolist():
+            e = 0
+            while n % p == 0:
+                n //= p
+                e += 1
+            factors.append((p, e))
+
+        # what is left has no prime factor up to sqrt(hi), so it is prime
+        if n > 1:
+            factors.append((n, 1))
+
+        return tuple(factors)
+
+def segmented_factor_sieve(lo, hi, primes):
+    """
+    Prime factors from primes (all primes up to sqrt(hi)) of every number from
+    lo to hi.
+
+    Returns a table with one row per number, its prime factors in ascending
+    order, and the number of factors in every row. The first one is the
+    smallest prime factor. Every prime crosses out its multiples in the
+    window, so the cost is about the size of the window times log log hi.
+
+    """
+    cl.debug("Sieving the prime factors from {} to {}".format(lo, hi))
+
+    # most distinct prime factors a number up to hi can have
+    width = 0
+    primorial = 1
+    for p in primes.tolist():
+        if primorial * p > hi:
+            break
+        primorial *= p
+        width += 1
+
+    table = np.zeros((hi - lo + 1, max(width, 1)), dtype=np.int64)
+    counts = np.zeros(hi - lo + 1, dtype=np.int64)
+
+    for p in primes.tolist():
+        start = -(-lo // p) * p
+        if start > hi:
+            continue
+
+        idx = np.arange(start - lo, hi - lo + 1, p)
+        table[idx, counts[idx]] = p
+        counts[idx] += 1
+
+    return table, counts
+
+def small_primes(limit):
+    """
+    All primes up to limit, with the sieve of Eratosthenes.
+
+    """
+    if limit < 2:
+        return np.zeros(0, dtype=np.int64)
+
+    is_prime = np.ones(limit + 1, dtype=bool)
+    is_prime[:2] = False
+    for p in range(2, math.isqrt(limit) + 1):
+        if is_prime[p]:
+            is_prime[p*p::p] = False
+
+    return np.flatnonzero(is_prime)
+
+def is_probable_prime(n):
+    """
+    Miller-Rabin test with the bases in MILLER_RABIN_BASES.
+
+    """
+    if n < 2:
+        return False
+
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for base in MILLER_RABIN_BASES:
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+def pollard_rho(n, seed=0):
+    """
+    Non-trivial factor of the composite odd number n, with Brent's variant of
+    Pollard's rho.
+
+    """
+    rng = random.Random(seed)
+
+    while True:
+        c = rng.randrange(1, n)
+        y = rng.randrange(0, n)
+
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(RHO_BATCH, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += RHO_BATCH
+            r *= 2
+
+        if g == n:
+            # the batch overshot, step through it one by one
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+
+        if g != n:
+            return g
+
+def _prime_factors(n):
+    """
+    List of the prime factors of n, with repetitions.
+
+    """
+    factors = list()
+
+    p = 2
+    while p * p <= n and (n < TRIAL_DIVISION_LIMIT or p < 2**10):
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+        p += 1 if p == 2 else 2
+
+    if n == 1:
+        return factors
+    if n < TRIAL_DIVISION_LIMIT or is_probable_prime(n):
+        return factors + [n]
+
+    d = pollard_rho(n)
+    return factors + _prime_factors(d) + _prime_factors(n // d)
+
+def _combine(primes):
+    """
+    Tuple of (prime, exponent) pairs from a list of primes.
+
+    """
+    factors = dict()
+    for p in primes:
+        factors[p] = factors.get(p, 0) + 1
+
+    return tuple(sorted(factors.items()))
@@ -5,9 +5,13 @@ Generate a set of random numbers from a LCG.
 """
 from util.logging.logger import CoreLog as cl
 import modules.lcg as lcg
+from modules.bit_sequence import BitSequence
 
 import numpy as np
 
+# order of the parameters in a parameter tuple
+PARAMETER_NAMES = ("x0", "a", "c", "m")
+
 def parameter_sweep(
         x0,
         a_min=1,
@@ -18,7 +22,7 @@ def parameter_sweep(
         mod_max=2**12,
 ):
     """
-    Generate a list of parameters.
+    Generate the parameters of a sweep.
 
     Since we would like to have 20000 bits in a sequence, we need a modulus big
     enough to not repeat in those 20000 digits.
@@ -27,32 +31,115 @@ def parameter_sweep(
     number, and 2^11 = 2048.
     11*2^11 = 22528 bits
 
-    """
-    output_list = list()
+    Returns a ParameterSweep, the parameter tuples are only created while
+    iterating over it.
 
-    for mod in range(mod_min, mod_max+1):
-        for c in range(c_min, c_max+1):
-            if (c > mod - 1):
-                break
-            for a in range(a_min, a_max+1):
-                if (a > mod - 1):
-                    break
-                param = dict()
-                param["x0"] = int(x0)
-                param["a"] = int(a)
-                param["c"] = int(c)
-                param["m"] = int(mod)
-                output_list.append(param)
+    """
+    sweep = ParameterSweep(x0, a_min, a_max, c_min, c_max, mod_min, mod_max)
 
-    cl.info("Created {} parameters".format(len(output_list)))
+    count = sweep.count()
+    cl.info("Created {} parameters".format(count))
     cl.info("At one second per check this will take about {} seconds (or "
             "{:.2f} minutes; or {:.2f} hours)".format(
-                len(output_list),
-                len(output_list)/60,
-                len(output_list)/3600)
+                count,
+                count/60,
+                count/3600)
     )
 
-    return output_list
+    return sweep
+
+class ParameterSweep:
+    """
+    Lazy sweep over the parameters of the LCG.
+
+    Iterating yields (x0, a, c, m) tuples, ordered by m, then c, then a. For
+    every modulus only a < m and c < m are used. The number of parameter sets
+    is calculated without generating them, use count() since it can be too
+    big for len().
+
+    """
+    def __init__(self, x0, a_min, a_max, c_min, c_max, mod_min, mod_max):
+        self.x0 = int(x0)
+        self.a_min = int(a_min)
+        self.a_max = int(a_max)
+        self.c_min = int(c_min)
+        self.c_max = int(c_max)
+        self.mod_min = int(mod_min)
+        self.mod_max = int(mod_max)
+
+    def __iter__(self):
+        for mod in range(self.mod_min, self.mod_max+1):
+            for c in range(self.c_min, min(self.c_max, mod - 1)+1):
+                for a in range(self.a_min, min(self.a_max, mod - 1)+1):
+                    yield (self.x0, a, c, mod)
+
+    def count(self):
+        """
+        Number of parameter sets in the sweep.
+
+        For a modulus m there are min(a_max, m-1) - a_min + 1 values of a (at
+        least 0), the same goes for c. Between the moduli where one of these
+        bounds kicks in both numbers are constant or grow by one per modulus,
+        so every such segment is summed up in closed form.
+
+        """
+        if self.mod_max < self.mod_min:
+            return 0
+
+        # moduli where the number of a or c values changes its behaviour
+        breaks = set([self.mod_min, self.mod_max + 1])
+        for bound in [self.a_min, self.a_max, self.c_min, self.c_max]:
+            if self.mod_min < bound + 1 <= self.mod_max:
+                breaks.add(bound + 1)
+        breaks = sorted(breaks)
+
+        total = 0
+        for lo, hi in zip(breaks[:-1], breaks[1:]):
+            # the counts are linear in m within [lo, hi)
+            a_slope, a_offset = _linear_count(self.a_min, self.a_max, lo)
+            c_slope, c_offset = _linear_count(self.c_min, self.c_max, lo)
+
+            n = hi - lo
+            sum_m = _sum_powers(lo, hi, 1)
+            sum_m2 = _sum_powers(lo, hi, 2)
+
+            total += (a_slope * c_slope * sum_m2
+                      + (a_slope * c_offset + c_slope * a_offset) * sum_m
+                      + a_offset * c_offset * n)
+
+        return total
+
+def _linear_count(lower, upper, mod):
+    """
+    Number of values in [lower, min(upper, m-1)] as slope * m + offset, valid
+    from mod up to the next break.
+
+    """
+    if upper < lower or mod - 1 < lower:
+        return 0, 0
+    if mod - 1 < upper:
+        return 1, -lower
+    return 0, upper - lower + 1
+
+def _sum_powers(lo, hi, power):
+    """
+    Sum of m**power for m in [lo, hi).
+
+    """
+    def prefix(n):
+        # sum over m in [0, n)
+        if power == 1:
+            return n * (n - 1) // 2
+        return (n - 1) * n * (2*n - 1) // 6
+
+    return prefix(hi) - prefix(lo)
+
+def parameter_dict(parameter_tuple):
+    """
+    Dictionary with the parameters of an (x0, a, c, m) tuple.
+
+    """
+    return dict(zip(PARAMETER_NAMES, parameter_tuple))
 
 def gen_params():
     """
@@ -144,26 +231,26 @@ def gen_expected_statistic(modulus):
     Generate the ratio of 0s to 1s for a given modulus.
 
     """
-    nums = list()
+    # put every number until modulus in a sequence
+    nums = np.arange(modulus, dtype=np.uint64)
+    padding = gen_padding(modulus)
 
-    # put every number until modulus in a list
-    for i in range(modulus):
-        nums.append(i)
+    binary_sequence = gen_bit_sequence(
+        nums, modulus=modulus, length=padding*len(nums))
 
-    binary_nums = gen_binary_nums(nums, modulus=modulus)
-    binary_sequence = gen_binary_sequence(
-        binary_nums, length=modulus*len(binary_nums))
+    ones = binary_sequence.count_ones()
+    zeros = len(binary_sequence) - ones
 
-    bin_sorted = sorted(binary_sequence)
-    one_zero, counts = np.unique(bin_sorted, return_counts=True)
-
-    zero_over_one = counts[0] / counts[1]
+    zero_over_one = zeros / ones
 
     return zero_over_one
 
 def gen_nums(params, length=20000):
     """
-    Generate a list of pseudorandom numbers with the LCG.
+    Generate an array of pseudorandom numbers with the LCG.
+
+    Moduli up to 2**64 use the block generator, everything bigger falls back
+    to stepping the LCG one number at a time.
 
     """
     x0 = params["x0"]
@@ -171,18 +258,31 @@ def gen_nums(params, length=20000):
     c = params["c"]
     m = params["m"]
 
-    # output list
-    res = list()
-
     cl.verbose(
         "Generating pseudorandom numbers for parameters x0 = {}, a = {}, "
         "c = {}, m = {}".format(x0, a, c, m))
 
+    if m <= lcg.BLOCK_MAX_MODULUS:
+        return lcg.lcg_block(x0, a, c, m, length)
+
+    # output list
+    res = list()
+
     for _ in range(length):
         x0 = lcg.lcg(x0, a, c, m)
         res.append(x0)
 
-    return res
+    return np.asarray(res, dtype=object)
+
+def gen_padding(modulus):
+    """
+    Number of binary digits needed for the numbers below the modulus.
+
+    """
+    padding = max(1, (modulus - 1).bit_length())
+    cl.verbose("Padding numbers to {} digits".format(padding))
+
+    return padding
 
 def gen_binary_nums(nums, modulus=None):
     """
@@ -196,15 +296,7 @@ def gen_binary_nums(nums, modulus=None):
     padding = 0
 
     if modulus:
-        n = 0
-        while 2**n < modulus:
-            n += 1
-
-        if n > 0:
-            padding = len("{:b}".format(2**(n-1)))
-        else:
-            padding = 1
-        cl.verbose("Padding numbers to {} digits".format(padding))
+        padding = gen_padding(modulus)
 
     for num in nums:
         res.append("{:b}".format(num).zfill(padding))
@@ -216,11 +308,45 @@ def gen_binary_sequence(binary_nums, length=20000):
     Turn a list of binary numbers into a sequence.
 
     """
-    res = str()
-
-    for num in binary_nums:
-        res += num
+    res = "".join(binary_nums)
 
     res = res[0:length]
 
     return res
+
+def gen_bit_sequence(nums, modulus=None, length=20000):
+    """
+    Turn an array of numbers into a BitSequence.
+
+    Gives the same bits as gen_binary_sequence(gen_binary_nums(nums, modulus))
+    but expands the numbers with NumPy instead of formatting strings.
+
+    """
+    padding = 0
+
+    if modulus:
+        padding = gen_padding(modulus)
+
+    nums = np.asarray(nums)
+
+    # numbers beyond 64 bits are left to python
+    if nums.dtype == object:
+        return BitSequence.from_string(gen_binary_sequence(
+            gen_binary_nums(nums, modulus=modulus), length=length))
+
+    # every number contributes at least `padding` bits
+    nums = nums[:-(-length // max(padding, 1))].astype(">u8")
+
+    # 64 bits per number, most significant bit first
+    bits = np.unpackbits(nums.view(np.uint8).reshape(-1, 8), axis=1)
+
+    if padding and (len(nums) == 0 or nums.max() < 2**padding):
+        bits = bits[:, 64-padding:].reshape(-1)
+    else:
+        # keep everything from the leading 1 on, but at least `padding` bits
+        # (and at least one bit, so 0 becomes "0")
+        keep = np.maximum.accumulate(bits, axis=1).astype(bool)
+        keep[:, 64-max(padding, 1):] = True
+        bits = bits[keep]
+
+    return BitSequence.from_bits(bits[:length])
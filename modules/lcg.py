@@ -3,6 +3,14 @@
 Implements a Linear Congruential Generator.
 
 """
+import numpy as np
+
+# biggest modulus the block generator can handle with uint64 arithmetic
+BLOCK_MAX_MODULUS = 2**64
+
+# default number of lanes (numbers per row) in the block generator
+LANES = 1024
+
 def lcg(x0, a, c, m):
     """
     Returns the next number from a linear congruential generator.
@@ -10,3 +18,209 @@ def lcg(x0, a, c, m):
     """
     x0 = (a*x0 + c) % m
     return x0
+
+def lcg_jump(a, c, m, n):
+    """
+    Returns multiplier and increment of the LCG that is n steps ahead.
+
+    Advancing the LCG by n steps is again a LCG with x_n = (A*x0 + C) mod m.
+    A and C are calculated by exponentiation by squaring, so this takes
+    O(log n) steps.
+
+    """
+    if n < 0:
+        raise ValueError("Can not jump {} steps back".format(-n))
+
+    jump_a = 1
+    jump_c = 0
+    step_a = a % m
+    step_c = c % m
+
+    while n > 0:
+        if n & 1:
+            jump_a = (step_a * jump_a) % m
+            jump_c = (step_a * jump_c + step_c) % m
+        step_c = (step_a * step_c + step_c) % m
+        step_a = (step_a * step_a) % m
+        n >>= 1
+
+    return jump_a % m, jump_c % m
+
+def lcg_skip(x0, a, c, m, n):
+    """
+    Returns the number that the LCG produces n steps after x0.
+
+    """
+    jump_a, jump_c = lcg_jump(a, c, m, n)
+    return (jump_a * x0 + jump_c) % m
+
+def split(x0, a, c, m, k, stride):
+    """
+    Split the stream starting at x0 into k substreams of length stride.
+
+    Returns the k start values. Substream i continues from the i-th start
+    value and yields the numbers i*stride + 1 up to (i + 1)*stride of the
+    original stream, so the substreams do not overlap as long as k*stride does
+    not exceed the period of the generator.
+
+    """
+    if k < 1:
+        raise ValueError("Can not split into {} substreams".format(k))
+
+    jump_a, jump_c = lcg_jump(a, c, m, stride)
+
+    states = [x0]
+    for _ in range(k - 1):
+        states.append((jump_a * states[-1] + jump_c) % m)
+
+    return states
+
+def lcg_block(x0, a, c, m, length, lanes=LANES):
+    """
+    Returns the next `length` numbers from a linear congruential generator as
+    a NumPy array.
+
+    The output is split into `lanes` interleaved streams (rounded up to a power
+    of two). The first row of lanes is built by repeatedly doubling the known
+    part of the sequence with a jump of as many steps as are already known.
+    After that every lane advances by `lanes` steps at a time, so each
+    iteration produces a whole row of numbers at once. The numbers are exactly
+    the ones that repeated calls to lcg() return.
+
+    Works for every modulus up to 2**64.
+
+    """
+    if m > BLOCK_MAX_MODULUS:
+        raise ValueError("Modulus {} does not fit into 64 bits".format(m))
+
+    if length <= 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    # first row, exact python integers while the row is still short
+    row = np.asarray([lcg(x0, a, c, m)], dtype=object)
+    jump_a = a % m
+    jump_c = c % m
+
+    while len(row) < min(lanes, length):
+        row = np.concatenate((row, (jump_a * row + jump_c) % m))
+        jump_c = (jump_a * jump_c + jump_c) % m
+        jump_a = (jump_a * jump_a) % m
+
+    lanes = len(row)
+    rows = -(-length // lanes)
+    res = np.empty((rows, lanes), dtype=np.uint64)
+    res[0] = row
+
+    tables = _mul_tables(jump_a, m)
+
+    with np.errstate(over="ignore"):
+        for r in range(1, rows):
+            res[r] = _affine(res[r - 1], jump_a, jump_c, m, tables)
+
+    return res.reshape(-1)[:length]
+
+def lcg_many(x0, a, c, m, length):
+    """
+    Returns `length` numbers for many linear congruential generators with a
+    common modulus at once.
+
+    x0, a and c hold one entry per generator, the result has one row of
+    numbers per generator. For powers of two and moduli up to 2**32 all
+    generators advance together, bigger moduli go through lcg_block() one
+    generator at a time.
+
+    """
+    if m > BLOCK_MAX_MODULUS:
+        raise ValueError("Modulus {} does not fit into 64 bits".format(m))
+
+    x0 = [int(x) for x in x0]
+    a = [int(i) % m for i in a]
+    c = [int(i) % m for i in c]
+
+    if length <= 0:
+        return np.zeros((len(x0), 0), dtype=np.uint64)
+
+    if not (m & (m - 1) == 0 or m <= 2**32):
+        return np.asarray([
+            lcg_block(x, ai, ci, m, length) for x, ai, ci in zip(x0, a, c)
+        ]).reshape(len(x0), length)
+
+    res = np.empty((length, len(x0)), dtype=np.uint64)
+    res[0] = [lcg(x, ai, ci, m) for x, ai, ci in zip(x0, a, c)]
+
+    ua = np.asarray(a, dtype=np.uint64)
+    uc = np.asarray(c, dtype=np.uint64)
+
+    with np.errstate(over="ignore"):
+        for i in range(1, length):
+            res[i] = _affine(res[i - 1], ua, uc, m)
+
+    return res.T
+
+def _affine(x, a, c, m, tables=None):
+    """
+    Calculate (a*x + c) mod m for a uint64 array x without overflowing.
+
+    a and c are integers in [0, m). tables are the lookup tables from
+    _mul_tables(a, m). For powers of two and moduli up to 2**32 a and c can
+    also be uint64 arrays of the same shape as x.
+
+    """
+    ua = np.asarray(a, dtype=np.uint64)
+    uc = np.asarray(c, dtype=np.uint64)
+
+    # powers of two (including 2**64) wrap around for free
+    if m & (m - 1) == 0:
+        return (ua * x + uc) & np.uint64(m - 1)
+
+    # a*x + c < 2**64 for every modulus up to 2**32
+    if m <= 2**32:
+        return (ua * x + uc) % np.uint64(m)
+
+    if tables is None:
+        tables = _mul_tables(a, m)
+
+    # a*x = sum_k a*256**k * (k-th byte of x)
+    res = np.full_like(x, uc)
+    um = np.uint64(m)
+    for k, table in enumerate(tables):
+        part = table[(x >> np.uint64(8*k)) & np.uint64(0xff)]
+        if m < 2**60:
+            # up to nine summands below m, the sum fits into 64 bits
+            res += part
+        else:
+            res = _addmod(res, part, um)
+
+    if m < 2**60:
+        res %= um
+
+    return res
+
+def _mul_tables(a, m):
+    """
+    Lookup tables of (a * 256**k * b) mod m for every byte b of a number
+    below m.
+
+    Only needed for moduli that are no power of two and bigger than 2**32.
+
+    """
+    if m & (m - 1) == 0 or m <= 2**32:
+        return None
+
+    tables = list()
+    ak = a % m
+    for _ in range(((m - 1).bit_length() + 7) // 8):
+        tables.append(np.asarray([(ak * b) % m for b in range(256)],
+                                 dtype=np.uint64))
+        ak = (ak * 256) % m
+
+    return tables
+
+def _addmod(x, y, um):
+    """
+    Calculate (x + y) mod m for uint64 arrays x, y with entries in [0, m).
+
+    """
+    s = x + y
+    # the sum either wrapped around 2**64 or is at least m
+    return np.where((s < x) | (s >= um), s - um, s)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Number theory of the LCG: factorization, multiplicative order and the period.
+
+"""
+import math
+
+import modules.lcg as lcg
+
+from modules.factorization import FactorizationService
+
+# the period is only calculated from the factorization up to this modulus,
+# beyond it factorizing with Pollard's rho can take too long
+PERIOD_MAX_MODULUS = 2**64
+
+# cycle detection gives up after this many numbers, that is more than a
+# sequence of 20000 bits ever uses
+BRENT_MAX_STEPS = 2**16
+
+# numbers per block of the generator in the cycle detection
+BRENT_BLOCK = 2**12
+
+# factorizations for everything outside of a sweep
+DEFAULT_FACTORIZATION = FactorizationService()
+
+def carmichael_factors(m, factorization=None):
+    """
+    Prime factorization of the Carmichael function lambda(m), the exponent of
+    the group of units mod m, as a dictionary {prime: exponent}.
+
+    It is put together from the factorizations of p - 1 for the primes p of
+    m, which are remembered by the factorization service on their own.
+
+    """
+    if factorization is None:
+        factorization = DEFAULT_FACTORIZATION
+
+    result = dict()
+
+    for p, e in factorization.factorize(m):
+        for q, f in _prime_power_carmichael(p, e, factorization):
+            result[q] = max(result.get(q, 0), f)
+
+    return result
+
+def multiplicative_order(a, m, factorization=None):
+    """
+    Smallest n > 0 with a^n = 1 mod m, a and m coprime.
+
+    """
+    a = a % m
+    if m == 1:
+        return 1
+    if math.gcd(a, m) != 1:
+        raise ValueError("{} is not a unit mod {}".format(a, m))
+
+    return _order(a, m, carmichael_factors(m, factorization))
+
+def hull_dobell(a, c, m, factorization=None):
+    """
+    Check the Hull-Dobell theorem, the LCG has the full period m if and only if
+
+        c and m are coprime,
+        a - 1 is divisible by all prime factors of m,
+        a - 1 is divisible by 4 if m is.
+
+    """
+    if factorization is None:
+        factorization = DEFAULT_FACTORIZATION
+
+    if math.gcd(c, m) != 1:
+        return False
+
+    for p, _ in factorization.factorize(m):
+        if (a - 1) % p != 0:
+            return False
+
+    if m % 4 == 0 and (a - 1) % 4 != 0:
+        return False
+
+    return True
+
+def period(x0, a, c, m, factorization=None, max_steps=BRENT_MAX_STEPS):
+    """
+    Exact period of the LCG with the parameters, the length of the cycle the
+    sequence ends up in.
+
+    By the Chinese remainder theorem the period is the least common multiple
+    of the periods mod the prime powers of m, see prime_power_period(). Only
+    the factorization of m and of p - 1 for its primes p is needed, the rest
+    are a few modular powers.
+
+    Moduli above PERIOD_MAX_MODULUS are not factorized, their period comes
+    from brent_period() and is None if it takes more than max_steps numbers
+    to find it.
+
+    """
+    if m > PERIOD_MAX_MODULUS:
+        return brent_period(x0, a, c, m, max_steps)
+
+    if factorization is None:
+        factorization = DEFAULT_FACTORIZATION
+
+    if c % m != 0 and hull_dobell(a, c, m, factorization):
+        return m
+
+    result = 1
+    for p, e in factorization.factorize(m):
+        result = math.lcm(result, prime_power_period(x0, a, c, p, e,
+                                                     factorization))
+
+    return result
+
+def prime_power_period(x0, a, c, p, e, factorization=None):
+    """
+    Period of the LCG mod p^e.
+
+    If p divides a, a^e = 0 mod p^e and the sequence ends in a fixed point.
+    Otherwise the LCG is a permutation and with y = (a - 1)*x0 + c
+
+        x_n - x0 = y * (1 + a + ... + a^(n-1)) mod p^e
+
+    so the period is the smallest n with p^f | 1 + a + ... + a^(n-1), where
+    p^f = p^e / gcd(y, p^e). Multiplied with a - 1 = p^k * u (u coprime to p)
+    this is a^n = 1 mod p^(k+f), the period is the order of a mod p^(k+f).
+
+    """
+    q = p**e
+    a = a % q
+    x0 = x0 % q
+
+    if a % p == 0:
+        return 1
+
+    f = e - _valuation((a - 1) * x0 + c, p, e)
+    if f == 0:
+        return 1
+
+    if a == 1:
+        return p**f
+
+    k = _valuation(a - 1, p, e)
+    lambda_factors = dict(_prime_power_carmichael(p, k + f, factorization))
+
+    return _order(a, p**(k + f), lambda_factors)
+
+def brent_period(x0, a, c, m, max_steps=BRENT_MAX_STEPS):
+    """
+    Period of the LCG from Brent's cycle detection on the generated numbers,
+    None if it takes more than max_steps numbers.
+
+    period() only falls back to this for moduli beyond PERIOD_MAX_MODULUS,
+    the numbers are then generated one by one. For smaller moduli, when it is
+    called on its own, they come from the block generator.
+
+    """
+    stream = _lcg_stream(x0, a, c, m)
+
+    power = length = 1
+    tortoise = x0 % m
+    hare = next(stream)
+
+    steps = 1
+    while tortoise != hare:
+        if power == length:
+            tortoise = hare
+            power *= 2
+            length = 0
+
+        hare = next(stream)
+        length += 1
+        steps += 1
+
+        if steps > max_steps:
+            return None
+
+    return length
+
+def _lcg_stream(x0, a, c, m):
+    """
+    Iterate over the numbers of the LCG, from the block generator where it
+    can be used (moduli up to lcg.BLOCK_MAX_MODULUS, which is the same as
+    PERIOD_MAX_MODULUS).
+
+    """
+    x = x0
+    while True:
+        if m <= lcg.BLOCK_MAX_MODULUS:
+            block = lcg.lcg_block(x, a, c, m, BRENT_BLOCK).tolist()
+        else:
+            block = list()
+            for _ in range(BRENT_BLOCK):
+                x = lcg.lcg(x, a, c, m)
+                block.append(x)
+
+        yield from block
+        x = block[-1]
+
+def _prime_power_carmichael(p, e, factorization):
+    """
+    Factorization of lambda(p^e) as a list of (prime, exponent) pairs.
+
+    """
+    if p == 2:
+        # lambda(2) = 1, lambda(4) = 2, lambda(2^e) = 2^(e-2)
+        if e == 1:
+            return list()
+        return [(2, max(1, e - 2))]
+
+    if factorization is None:
+        factorization = DEFAULT_FACTORIZATION
+
+    factors = dict(factorization.factorize(p - 1))
+    if e > 1:
+        factors[p] = factors.get(p, 0) + e - 1
+
+    return list(factors.items())
+
+def _order(a, m, lambda_factors):
+    """
+    Order of the unit a mod m from the factorization of lambda(m).
+
+    """
+    order = 1
+    for q, f in lambda_factors.items():
+        order *= q**f
+
+    # divide out every prime as long as a^order stays 1
+    for q, f in lambda_factors.items():
+        for _ in range(f):
+            if pow(a, order // q, m) != 1 % m:
+                break
+            order //= q
+
+    return order
+
+def _valuation(n, p, e):
+    """
+    Exponent of p in n, at most e (also for n = 0).
+
+    """
+    v = 0
+    while v < e and n % p == 0:
+        n //= p
+        v += 1
+
+    return v
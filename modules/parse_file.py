@@ -3,26 +3,113 @@
 Parse random numbers from a file.
 
 """
+import os
+
 import numpy as np
 
-def parse_from_file(file_name):
+from modules.bit_sequence import BitSequence
+
+# bytes of the file that are scanned at once
+READ_CHUNK = 2**24
+
+# class of every byte: the bit for '0' and '1', WHITESPACE or INVALID, only
+# needed for files with other whitespace than spaces and newlines
+WHITESPACE = 2
+INVALID = 3
+
+BYTE_CLASS = np.full(256, INVALID, dtype=np.uint8)
+BYTE_CLASS[ord("0")] = 0
+BYTE_CLASS[ord("1")] = 1
+BYTE_CLASS[list(b" \t\n\r\v\f")] = WHITESPACE
+
+def parse_from_file(file_name, length=20000):
     """
     Parse random numbers from the provided file name.
 
+    Returns the first 20000 bits as a BitSequence, or all of them if the file
+    is shorter. Only as much of the file is read as needed.
+
     """
-    data = str()
-    binary_data = np.genfromtxt(file_name, dtype=str, delimiter=" ")
+    bits = list()
+    count = 0
+
+    for chunk in iter_bits(file_name):
+        bits.append(chunk)
+        count += len(chunk)
+        if count >= length:
+            break
+
+    if not bits:
+        return BitSequence.from_bits([])
+
+    # length of 20000 is required, tests are adjusted for that.
+    return BitSequence.from_bits(np.concatenate(bits)[:length])
+
+def iter_blocks(file_name, length=20000, step=None, chunk_size=READ_CHUNK):
+    """
+    Iterate over the blocks of length bits in the file, as BitSequences.
+
+    A new block starts every step bits, by default right after the last one.
+    With a smaller step the blocks overlap. Bits at the end of the file that
+    don't fill a whole block are left out. The file is read lazily, so only
+    about one chunk of it is in memory at a time.
+
+    """
+    if step is None:
+        step = length
+    if length < 1 or step < 1:
+        raise ValueError("Block length and step must be positive")
+
+    # bits that are not used up yet and where the next block starts in them
+    pending = np.zeros(0, dtype=np.uint8)
+    start = 0
+
+    for chunk in iter_bits(file_name, chunk_size):
+        pending = np.concatenate([pending, chunk])
+
+        while start + length <= len(pending):
+            yield BitSequence.from_bits(pending[start:start + length])
+            start += step
+
+        done = min(start, len(pending))
+        pending = pending[done:]
+        start -= done
+
+def iter_bits(file_name, chunk_size=READ_CHUNK):
+    """
+    Iterate over the bits of a file of '0' and '1' characters, one array of
+    bits (one uint8 per bit) per chunk of the file.
+
+    Every chunk is memory mapped on its own, so the memory use stays the same
+    for any size of file, and scanned with a few vectorized passes, whitespace
+    is dropped. Raises ValueError for any other character.
+
+    """
+    size = os.path.getsize(file_name)
+
+    for offset in range(0, size, chunk_size):
+        chunk = np.memmap(file_name, dtype=np.uint8, mode="r", offset=offset,
+                          shape=min(chunk_size, size - offset))
+
+        bits = chunk - ord("0")
+        is_bit = bits < 2
+        count = np.count_nonzero(is_bit)
 
-    if len(binary_data.shape) == 1:
-        for i in binary_data:
-            data += i
+        if count == len(chunk):
+            yield bits
+            continue
 
-    elif len(binary_data.shape) == 2:
-        for inner_bin in binary_data:
-            for i in inner_bin:
-                data += i
+        # everything else has to be whitespace, spaces and newlines are by far
+        # the most common, so they are counted first
+        other = (len(chunk) - count - np.count_nonzero(chunk == ord(" "))
+                 - np.count_nonzero(chunk == ord("\n")))
 
-    else:
-        data += "{}".format(binary_data)
+        if other > 0:
+            invalid = np.flatnonzero(BYTE_CLASS[chunk] == INVALID)
+            if len(invalid) > 0:
+                raise ValueError("Invalid character {!r} at byte {} of {}, "
+                                 "binary sequence must only contain 0 and "
+                                 "1".format(chr(chunk[invalid[0]]),
+                                            offset + invalid[0], file_name))
 
-    return data[:20000]         # length of 20000 is required, tests are adjusted for that.
+        yield bits[is_bit]
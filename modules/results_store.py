@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Store test results on disk.
+
+"""
+import pickle
+import sqlite3
+
+from util.logging.logger import CoreLog as cl
+
+class ResultsStore:
+    """
+    Results in an append-only SQLite database.
+
+    Every result is one row, keyed by a tuple of integers (usually x0, a, c and
+    m). The database runs in WAL mode, so a new result is appended to the log
+    instead of rewriting the file and an interrupted write never damages the
+    results that are already stored. SQLite merges the log back into the
+    database on its own from time to time.
+
+    All keys are kept in memory, so checking for a known result does not touch
+    the disk.
+
+    """
+    def __init__(self, path):
+        """
+        Open (or create) the database at path.
+
+        """
+        self.path = path
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, value BLOB)")
+        self._connection.commit()
+
+        self._keys = set(
+            row[0] for row in self._connection.execute(
+                "SELECT key FROM results"))
+
+        cl.debug("Opened results store {} with {} results".format(
+            path, len(self._keys)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, key):
+        return _encode_key(key) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def close(self):
+        """
+        Close the database.
+
+        """
+        self._connection.close()
+
+    def get(self, key, default=None):
+        """
+        Return the result for key.
+
+        """
+        row = self._connection.execute(
+            "SELECT value FROM results WHERE key = ?",
+            (_encode_key(key),)).fetchone()
+
+        if row is None:
+            return default
+
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        """
+        Store one result.
+
+        """
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        """
+        Store a batch of (key, value) pairs in one transaction.
+
+        Either all of them are stored or none.
+
+        """
+        rows = [
+            (_encode_key(key), pickle.dumps(value)) for key, value in items
+        ]
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                rows)
+
+        self._keys.update(row[0] for row in rows)
+
+    def items(self):
+        """
+        Iterate over all (key, value) pairs, in the order they were stored.
+
+        """
+        for key, value in self._connection.execute(
+                "SELECT key, value FROM results ORDER BY rowid"):
+            yield _decode_key(key), pickle.loads(value)
+
+    def to_nested_dict(self):
+        """
+        Return all results as nested dictionary, e.g. res[x0][a][c][m].
+
+        """
+        res_dict = dict()
+
+        for key, value in self.items():
+            inner = res_dict
+            for k in key[:-1]:
+                inner = inner.setdefault(k, dict())
+            inner[key[-1]] = value
+
+        return res_dict
+
+    def import_pickle(self, pickle_file):
+        """
+        Import the results from a pickled nested dictionary res[x0][a][c][m].
+
+        """
+        with open(str(pickle_file), "rb") as input_file:
+            try:
+                res_dict = pickle.load(input_file)
+            except EOFError:
+                return 0
+
+        items = list()
+        for x0, a_dict in res_dict.items():
+            for a, c_dict in a_dict.items():
+                for c, m_dict in c_dict.items():
+                    for m, value in m_dict.items():
+                        items.append(((x0, a, c, m), value))
+
+        self.put_many(items)
+
+        return len(items)
+
+def _encode_key(key):
+    """
+    Keys are stored as text, the integers can be bigger than 64 bits.
+
+    """
+    return ",".join(str(int(k)) for k in key)
+
+def _decode_key(key):
+    return tuple(int(k) for k in key.split(","))
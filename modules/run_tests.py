@@ -11,237 +11,888 @@ import modules.statistical_test_monobit as monobit
 import modules.statistical_test_poker as poker
 import modules.statistical_test_runs as runs
 import modules.statistical_test_autocorrelation as ac
+import modules.statistical_test_fips as fips
 import modules.special_test_spectral as st
+import modules.special_test_spectral_lll as lll
+import modules.batch_tests as batch_tests
+import modules.lcg as lcg
+import modules.number_theory as nt
+import modules.parse_file as parse_file
+
+from modules.executor import SweepExecutor
+from modules.factorization import FactorizationService
+from modules.results_store import ResultsStore
+from modules.spectral_cache import SpectralCache
 
 import numpy as np
-import pickle
+import os
 import pathlib
 
+# statistical tests that make up the verdict, in the order they are reported
+STATISTICAL_TESTS = ["monobit", "poker", "runs", "long_runs", "autocorrelation"]
+
+# bits of a tested sequence (and of a block of an input file), the tests are
+# made for 20000 bits
+BLOCK_LENGTH = 20000
+
+# result of a test that was skipped because the verdict was already decided
+NOT_RUN = "not run"
+
+# tests of the fail-fast mode, cheapest first, the spectral test is only this
+# cheap with Knuth's search up to about five dimensions
+FAIL_FAST_ORDER = ["monobit", "poker", "runs", "long_runs", "spectral",
+                   "autocorrelation"]
+
 def run_tests(args, numbers_from_file=None):
     """
     Run the tests for the LCG.
 
     """
-    if numbers_from_file:
-        binary_sequence = numbers_from_file
-        sequence_test(args, binary_sequence)
+    test_sequence = select_sequence_test(args)
+
+    # one worker pool for all tests of the sweep
+    with SweepExecutor(args.j) as executor:
+        if args.blocks:
+            run_blocks(args, executor)
+
+        elif numbers_from_file is not None:
+            binary_sequence = numbers_from_file
+            test_sequence(args, binary_sequence, executor=executor)
 
-    else:
-        x0 = args.x
-
-        if len(args.a) == 1:
-            amin = eval(args.a[0])
-            amax = eval(args.a[0])
-        elif len(args.a) == 2:
-            amin = min(eval(args.a[0]), eval(args.a[1]))
-            amax = max(eval(args.a[0]), eval(args.a[1]))
-        else:
-            cl.error("Can't parse a")
-
-        if len(args.c) == 1:
-            cmin = eval(args.c[0])
-            cmax = eval(args.c[0])
-        elif len(args.c) == 2:
-            cmin = min(eval(args.c[0]), eval(args.c[1]))
-            cmax = max(eval(args.c[0]), eval(args.c[1]))
         else:
-            cl.error("Can't parse c")
-
-        if len(args.m) == 1:
-            mmin = eval(args.m[0])
-            mmax = eval(args.m[0])
-        elif len(args.m) == 2:
-            mmin = min(eval(args.m[0]), eval(args.m[1]))
-            mmax = max(eval(args.m[0]), eval(args.m[1]))
+            run_sweep(args, test_sequence, executor)
+
+def run_blocks(args, executor):
+    """
+    Test every block of BLOCK_LENGTH bits of the input file, a new one every
+    args.block_step bits.
+
+    The blocks are read lazily and tested in the worker pool, only a few of
+    them are submitted ahead, so the file is only read once. The number of
+    blocks is not known before, the file size only gives an upper bound.
+    Every block gets its verdict, at the end the fraction of blocks that
+    passed every test is reported. Returns these numbers, see block_summary().
+
+    """
+    # every bit takes at least one byte of the file
+    size = os.path.getsize(args.input)
+    cl.info("Testing the blocks of {} bits, at most {}".format(
+        BLOCK_LENGTH, max(0, (size - BLOCK_LENGTH) // args.block_step + 1)))
+
+    if args.plot_ac:
+        cl.warning("Plots can't be shown from worker processes, testing the "
+                   "blocks serially")
+        executor = SweepExecutor()
+
+    blocks = parse_file.iter_blocks(args.input, BLOCK_LENGTH, args.block_step)
+    block_args = (
+        (args, block, calc_count)
+        for calc_count, block in enumerate(blocks, 1)
+    )
+
+    summary = block_summary(executor.imap(test_block, block_args))
+
+    if summary["blocks"] == 0:
+        cl.error("File {} has less than {} bits, not a single block".format(
+            args.input, BLOCK_LENGTH))
+        return None
+
+    for test in STATISTICAL_TESTS + ["all"]:
+        passed, not_run = summary[test]
+        line = "{}: {} of {} blocks passed ({:.1f} %)".format(
+            test, passed, summary["blocks"],
+            100 * passed / summary["blocks"])
+        if not_run:
+            line += ", {} not run".format(not_run)
+        cl.info(line)
+
+    return summary
+
+def test_block(args, block, calc_count):
+    """
+    Test one block of the input file.
+
+    This runs in a worker process.
+
+    """
+    return select_sequence_test(args)(args, block, calc_count, None)
+
+def block_summary(results):
+    """
+    Count the passes of every test over the results of many blocks.
+
+    Returns a dictionary with the number of blocks and for every test (and
+    "all" for all of them) a pair of the number of blocks that passed it and
+    the number of blocks where it was not run.
+
+    """
+    summary = {test: [0, 0] for test in STATISTICAL_TESTS + ["all"]}
+    summary["blocks"] = 0
+
+    for sequence_res in results:
+        summary["blocks"] += 1
+
+        for test in STATISTICAL_TESTS:
+            if sequence_res[test] == NOT_RUN:
+                summary[test][1] += 1
+            elif sequence_res[test]:
+                summary[test][0] += 1
+
+        if all(sequence_res[test] != NOT_RUN and sequence_res[test]
+               for test in STATISTICAL_TESTS):
+            summary["all"][0] += 1
+
+    for test in STATISTICAL_TESTS + ["all"]:
+        summary[test] = tuple(summary[test])
+
+    return summary
+
+def select_sequence_test(args):
+    """
+    Return the function that tests one sequence, as chosen in args.
+
+    """
+    if args.fail_fast:
+        return fail_fast_sequence_test
+    if args.fused:
+        return fused_sequence_test
+
+    return sequence_test
+
+def run_sweep(args, test_sequence, executor):
+    """
+    Run the tests for the LCG over the parameter ranges in args.
+
+    """
+    x0 = args.x
+
+    if len(args.a) == 1:
+        amin = eval(args.a[0])
+        amax = eval(args.a[0])
+    elif len(args.a) == 2:
+        amin = min(eval(args.a[0]), eval(args.a[1]))
+        amax = max(eval(args.a[0]), eval(args.a[1]))
+    else:
+        cl.error("Can't parse a")
+
+    if len(args.c) == 1:
+        cmin = eval(args.c[0])
+        cmax = eval(args.c[0])
+    elif len(args.c) == 2:
+        cmin = min(eval(args.c[0]), eval(args.c[1]))
+        cmax = max(eval(args.c[0]), eval(args.c[1]))
+    else:
+        cl.error("Can't parse c")
+
+    if len(args.m) == 1:
+        mmin = eval(args.m[0])
+        mmax = eval(args.m[0])
+    elif len(args.m) == 2:
+        mmin = min(eval(args.m[0]), eval(args.m[1]))
+        mmax = max(eval(args.m[0]), eval(args.m[1]))
+    else:
+        cl.error("Can't parse m")
+
+    if args.force:
+        cl.info("Forcing recalculation for every parameter")
+
+    # open file to save results in
+    results_dir = pathlib.Path(__file__).parent.parent / "results"
+
+    if not results_dir.is_dir():
+        results_dir.mkdir()
+
+    filename = "results_x0_{}_a_{}_{}_c_{}_{}_m_{}_{}".format(
+        x0, amin, amax, cmin, cmax, mmin, mmax)
+    res_file = results_dir / "{}.sqlite".format(filename)
+
+    cl.verbose("Using results file {}".format(res_file))
+
+    sweep = gpn.parameter_sweep(x0, amin, amax, cmin, cmax, mmin, mmax)
+
+    # the spectral test results and the factorizations of the moduli are
+    # shared between all sweeps
+    spectral_cache_file = results_dir / "spectral_cache.sqlite"
+    factorization_file = results_dir / "factorizations.sqlite"
+
+    with ResultsStore(res_file) as store, \
+         SpectralCache(spectral_cache_file) as spectral_cache, \
+         FactorizationService(max(1, mmin - 1), mmax,
+                              factorization_file) as factorization:
+
+        # pick up results from older pickled results files
+        pickle_file = results_dir / "{}.pickle".format(filename)
+        if len(store) == 0 and pickle_file.exists():
+            count = store.import_pickle(pickle_file)
+            cl.info("Imported {} results from {}".format(
+                count, pickle_file))
+
+        if args.parallel_sweep:
+            run_parallel(args, sweep, store, executor, spectral_cache,
+                         factorization)
+        elif args.batch:
+            run_batches(args, sweep, store, executor, spectral_cache,
+                        factorization)
         else:
-            cl.error("Can't parse m")
-
-        if args.force:
-            cl.info("Forcing recalculation for every parameter")
-
-        # open file to save results in
-        results_dir = pathlib.Path(__file__).parent.parent / "results"
-
-        if not results_dir.is_dir():
-            results_dir.mkdir()
-
-        filename = "results_x0_{}_a_{}_{}_c_{}_{}_m_{}_{}.pickle".format(
-            x0, amin, amax, cmin, cmax, mmin, mmax)
-        res_file = results_dir / filename
-
-        if not res_file.exists():
-            res_file.touch()
-
-        cl.verbose("Using results file {}".format(res_file))
-
-        param_list = gpn.parameter_sweep(x0, amin, amax, cmin, cmax, mmin, mmax)
-
-        calculation_counter = 0
-        max_calculations = len(param_list)
-
-        # calculations
-        for parameters in param_list:
-
-            x0 = parameters["x0"]
-            a = parameters["a"]
-            c = parameters["c"]
-            m = parameters["m"]
-
-            with open(str(res_file), "rb") as output_file:
-                cl.debug("Reading results from output file")
-
-                try:
-                    res_dict = pickle.load(output_file)
-                    cl.debug("Loading existing dictionary")
-                except EOFError:
-                    res_dict = dict()
-                    cl.debug("Creating new dictionary")
-                else:
-                    try:
-                        if (
-                                isinstance(res_dict[x0][a][c][m], dict)
-                                and
-                                not args.force
-                        ):
-                            cl.verbose("Datapoint {} exists, skipping".format(
-                                parameters))
-                            calculation_counter += 1
-                            continue
-                        if (
-                                isinstance(res_dict[x0][a][c][m], dict)
-                                and
-                                args.force
-                        ):
-                            cl.verbose("Datapoint {} exists, forcing "
-                                       "recalculation".format(parameters))
-                    except KeyError:
-                        pass
-
-            # create the dictionary step by step
-            try:
-                res = res_dict[x0]
-            except KeyError:
-                res_dict[x0] = dict()
-
-            try:
-                res = res_dict[x0][a]
-            except KeyError:
-                res_dict[x0][a] = dict()
-
-            try:
-                res = res_dict[x0][a][c]
-            except KeyError:
-                res_dict[x0][a][c] = dict()
-
-            try:
-                res = res_dict[x0][a][c][m]
-            except KeyError:
-                res_dict[x0][a][c][m] = dict()
-
-
-            # perform the actual calculation
-            nums = gpn.gen_nums(parameters)
-
-            if args.print:
-                string = "Random sequence: "
-                for i in range(args.print):
-                    if i < len(nums):
-                        string += "{}, ".format(nums[i])
-                string += "..."
-                cl.info(string)
-
-            if args.plot_spectral:
-                plt.figure()
-                xx = np.asarray(nums)[0:-1] / m
-                yy = np.asarray(nums)[1:] / m
-                plt.scatter(xx, yy, s=1)
-                plt.xlim([0, 1])
-                plt.ylim([0, 1])
-                plt.xlabel(r"$X_{n}$")
-                plt.ylabel(r"$X_{n+1}$")
-                plt.show()
-
-            bin_nums = gpn.gen_binary_nums(nums, modulus=parameters["m"])
-            binary_sequence = gpn.gen_binary_sequence(bin_nums)
-
-            calculation_counter += 1
-
-            sequence_res = sequence_test(
-                args, binary_sequence,
-                calculation_counter, max_calculations,
-                parameters
+            run_serial(args, sweep, store, test_sequence, executor,
+                       spectral_cache, factorization)
+
+    cl.info("Results written to file {}".format(res_file))
+
+def result_key(parameters):
+    """
+    Key of a parameter set in the results store.
+
+    """
+    return (parameters["x0"], parameters["a"], parameters["c"],
+            parameters["m"])
+
+def skip_parameters(args, store, parameters):
+    """
+    Check if the results for the parameters are already known and should not
+    be calculated again.
+
+    """
+    if result_key(parameters) in store:
+        if not args.force:
+            cl.verbose("Datapoint {} exists, skipping".format(parameters))
+            return True
+
+        cl.verbose("Datapoint {} exists, forcing recalculation".format(
+            parameters))
+
+    return False
+
+def pending_parameters(args, sweep, store, factorization=None):
+    """
+    Iterate over the parameter sets of the sweep that are not skipped.
+
+    Yields (calc_count, parameters, period, sequence_res) entries, calc_count
+    is the position in the sweep, starting at 1. The period is calculated
+    here, with the factorizations of the sweep, and goes along with the
+    entry into the results. sequence_res is None for parameter sets that have
+    to be tested. With args.prefilter the parameter sets with a too short
+    period already come with their results, every test NOT_RUN (see
+    prefilter_parameters()), they are stored in order with the others.
+
+    """
+    for calc_count, parameter_tuple in enumerate(sweep, 1):
+        parameters = gpn.parameter_dict(parameter_tuple)
+
+        if skip_parameters(args, store, parameters):
+            continue
+
+        period = sequence_period(parameters, factorization)
+
+        sequence_res = None
+        if args.prefilter:
+            sequence_res = prefilter_parameters(parameters, period)
+
+        yield calc_count, parameters, period, sequence_res
+
+def sequence_period(parameters, factorization=None, length=BLOCK_LENGTH):
+    """
+    Period of the LCG with the parameters, see nt.period().
+
+    Beyond nt.PERIOD_MAX_MODULUS the cycle detection only looks as far as it
+    takes to find a period that is shorter than the numbers of a sequence of
+    length bits, a longer one is None.
+
+    """
+    m = parameters["m"]
+    numbers = -(-length // gpn.gen_padding(m))
+
+    # Brent's cycle detection takes up to three times the period to find it
+    return nt.period(parameters["x0"], parameters["a"], parameters["c"], m,
+                     factorization, max_steps=3 * numbers)
+
+def prefilter_parameters(parameters, period, length=BLOCK_LENGTH):
+    """
+    Check if the period of the LCG is too short for a sequence of length bits.
+
+    Returns the results for the store with every test NOT_RUN if it is, None
+    if the parameters have to be tested (or the period is not known).
+
+    """
+    if period is None or period * gpn.gen_padding(parameters["m"]) >= length:
+        return None
+
+    cl.verbose("Period {} of parameters {} is too short for {} bits, not "
+               "testing them".format(period, parameters, length))
+
+    sequence_res = {test: NOT_RUN for test in STATISTICAL_TESTS}
+    sequence_res["longest_runs"] = NOT_RUN
+    sequence_res["spectral"] = NOT_RUN
+    sequence_res["period"] = period
+
+    return sequence_res
+
+def modulus_batches(entries, size):
+    """
+    Group (calc_count, parameters, ...) entries into batches of up to size
+    consecutive entries with the same modulus.
+
+    """
+    batch = list()
+    for entry in entries:
+        if batch and (len(batch) == size
+                      or batch[-1][1]["m"] != entry[1]["m"]):
+            yield batch
+            batch = list()
+
+        batch.append(entry)
+
+    if batch:
+        yield batch
+
+def run_serial(args, sweep, store, test_sequence, executor=None,
+               spectral_cache=None, factorization=None):
+    """
+    Run the tests for the LCG, one parameter set after the other.
+
+    """
+    max_calculations = sweep.count()
+
+    # calculations
+    for calc_count, parameters, period, sequence_res in pending_parameters(
+            args, sweep, store, factorization):
+
+        if sequence_res is None:
+            sequence_res = test_parameters(
+                args, parameters, test_sequence,
+                calc_count, max_calculations,
+                executor, spectral_cache, period
             )
 
-            res_dict[x0][a][c][m] = sequence_res
-            with open(str(res_file), "wb") as output_file:
-                cl.debug("Writing results to output file")
-                pickle.dump(res_dict, output_file)
+        store.put(result_key(parameters), sequence_res)
 
-        cl.info("Results written to file {}".format(res_file))
+def run_batches(args, sweep, store, executor=None, spectral_cache=None,
+                factorization=None):
+    """
+    Run the tests for the LCG on batches of parameter sets.
 
-def sequence_test(args, binary_sequence, calc_count=1, max_count=1, parameters=None):
+    Consecutive parameter sets with the same modulus are generated and
+    statistically tested together, args.batch at a time. The spectral test
+    still runs for every parameter set on its own. The results of a batch are
+    committed together.
+
+    """
+    max_calculations = sweep.count()
+
+    entries = pending_parameters(args, sweep, store, factorization)
+
+    for items in batch_items(args, entries, max_calculations, executor,
+                             spectral_cache):
+        store.put_many(items)
+
+def batch_items(args, entries, max_count, executor=None, spectral_cache=None):
+    """
+    Test (calc_count, parameters, period, sequence_res) entries in batches,
+    see test_batch().
+
+    Yields one list of (key, results) pairs per batch, in the order of the
+    entries. Entries that already have their results are passed on.
+
+    """
+    for batch in modulus_batches(entries, args.batch):
+        pending = [(calc_count, parameters, period)
+                   for calc_count, parameters, period, sequence_res in batch
+                   if sequence_res is None]
+
+        tested = iter(())
+        if pending:
+            tested = iter(test_batch(args, pending, max_count, executor,
+                                     spectral_cache))
+
+        items = list()
+        for calc_count, parameters, period, sequence_res in batch:
+            if sequence_res is None:
+                items.append(next(tested))
+            else:
+                items.append((result_key(parameters), sequence_res))
+
+        yield items
+
+def run_parallel(args, sweep, store, executor, spectral_cache=None,
+                 factorization=None):
+    """
+    Run the tests for the LCG with chunks of parameter sets spread across the
+    worker processes.
+
+    Every worker generates and tests its chunks end to end and only sends the
+    results back. They are committed here in the order of the sweep, one
+    transaction per chunk. The spectral cache is only used in this process,
+    known spectral test results are sent along with the chunks and new ones
+    are taken from the results.
+
+    """
+    if args.plot_ac or args.plot_spectral:
+        cl.warning("Plots can't be shown from worker processes, running the "
+                   "parameter sweep serially")
+        run_serial(args, sweep, store, select_sequence_test(args), executor,
+                   spectral_cache, factorization)
+        return
+
+    if spectral_cache is None:
+        spectral_cache = SpectralCache()
+
+    chunks = parameter_chunks(args, sweep, store, spectral_cache,
+                              factorization)
+
+    for items in executor.imap(test_chunk, chunks):
+        store.put_many(items)
+
+        new_spectral = dict()
+        for key, sequence_res in items:
+            spectral_key = SpectralCache.key(gpn.parameter_dict(key),
+                                             args.spectral_dimensions)
+            spectral = sequence_res["spectral"]
+            if (spectral_key not in spectral_cache and spectral != NOT_RUN
+                    and SpectralCache.cacheable(spectral)):
+                new_spectral[spectral_key] = spectral
+
+        spectral_cache.put_many(list(new_spectral.items()))
+
+def parameter_chunks(args, sweep, store, spectral_cache, factorization=None):
+    """
+    Split the parameter sets that are not skipped into chunks of args.chunk.
+
+    Yields the arguments of test_chunk(), the parameters are sent as
+    (x0, a, c, m) tuples together with the cached spectral test results (or
+    None), the period and the results from the prefilter (or None). The
+    periods are calculated here with the factorizations of the sweep, so the
+    workers don't have to factorize anything. The prefiltered
+    parameter sets go along with the chunks, so all results come back in the
+    order of the sweep.
+
+    """
+    max_calculations = sweep.count()
+
+    chunk = list()
+    for calc_count, parameters, period, sequence_res in pending_parameters(
+            args, sweep, store, factorization):
+
+        spectral = None
+        if sequence_res is None:
+            spectral = spectral_cache.get(
+                SpectralCache.key(parameters, args.spectral_dimensions))
+
+        chunk.append((calc_count, result_key(parameters), spectral, period,
+                      sequence_res))
+
+        if len(chunk) == args.chunk:
+            yield args, chunk, max_calculations
+            chunk = list()
+
+    if chunk:
+        yield args, chunk, max_calculations
+
+def test_chunk(args, chunk, max_count):
+    """
+    Generate and test a chunk of (calc_count, parameter tuple, spectral test
+    results, period, prefilter results) entries.
+
+    This runs in a worker process. Returns a list of (key, results) pairs for
+    the results store, in the order of the chunk.
+
+    """
+    test_sequence = select_sequence_test(args)
+
+    # the known spectral test results and the ones of this chunk
+    spectral_cache = SpectralCache()
+
+    entries = list()
+    for calc_count, parameter_tuple, spectral, period, sequence_res in chunk:
+        parameters = gpn.parameter_dict(parameter_tuple)
+        entries.append((calc_count, parameters, period, sequence_res))
+
+        if spectral is not None:
+            spectral_cache.put(
+                SpectralCache.key(parameters, args.spectral_dimensions),
+                spectral)
+
+    if args.batch:
+        items = list()
+        for batch in batch_items(args, entries, max_count,
+                                 spectral_cache=spectral_cache):
+            items += batch
+
+        return items
+
+    items = list()
+    for calc_count, parameters, period, sequence_res in entries:
+        if sequence_res is None:
+            sequence_res = test_parameters(args, parameters, test_sequence,
+                                           calc_count, max_count,
+                                           spectral_cache=spectral_cache,
+                                           period=period)
+        items.append((result_key(parameters), sequence_res))
+
+    return items
+
+def test_parameters(args, parameters, test_sequence, calc_count=1,
+                    max_count=1, executor=None, spectral_cache=None,
+                    period=None):
+    """
+    Generate the sequence for one parameter set and test it.
+
+    period is the period of the LCG, it is added to the results.
+
+    """
+    m = parameters["m"]
+
+    # perform the actual calculation
+    nums = gpn.gen_nums(parameters)
+
+    if args.print:
+        string = "Random sequence: "
+        for i in range(args.print):
+            if i < len(nums):
+                string += "{}, ".format(nums[i])
+        string += "..."
+        cl.info(string)
+
+    if args.plot_spectral:
+        plt.figure()
+        xx = np.asarray(nums)[0:-1] / m
+        yy = np.asarray(nums)[1:] / m
+        plt.scatter(xx, yy, s=1)
+        plt.xlim([0, 1])
+        plt.ylim([0, 1])
+        plt.xlabel(r"$X_{n}$")
+        plt.ylabel(r"$X_{n+1}$")
+        plt.show()
+
+    binary_sequence = gpn.gen_bit_sequence(nums, modulus=m)
+
+    return test_sequence(
+        args, binary_sequence,
+        calc_count, max_count,
+        parameters, executor, spectral_cache, period
+    )
+
+def test_batch(args, batch, max_count, executor=None, spectral_cache=None):
+    """
+    Generate and test a batch of (calc_count, parameters, period) entries
+    with the same modulus.
+
+    Returns a list of (key, results) pairs for the results store. The batch
+    generator needs moduli of up to 64 bits, bigger ones are tested one
+    parameter set after the other.
+
+    """
+    if executor is None:
+        executor = SweepExecutor()
+
+    if batch[0][1]["m"] > lcg.BLOCK_MAX_MODULUS:
+        test_sequence = select_sequence_test(args)
+        return [
+            (result_key(parameters),
+             test_parameters(args, parameters, test_sequence, calc_count,
+                             max_count, executor, spectral_cache, period))
+            for calc_count, parameters, period in batch
+        ]
+
+    parameter_list = [parameters for calc_count, parameters, period in batch]
+
+    if args.fail_fast:
+        # the whole batch is tested statistically at once, the spectral test
+        # is only needed where all statistical tests passed
+        batch_res = batch_tests.batch_results(parameter_list,
+                                              poker_width=args.poker_width)
+
+        spectral_list = list()
+        for parameters, sequence_res in zip(parameter_list, batch_res):
+            if all(sequence_res[test] for test in STATISTICAL_TESTS):
+                spectral_list.append(submit_spectral_test(
+                    args, executor, parameters, spectral_cache))
+            else:
+                sequence_res["spectral"] = NOT_RUN
+                spectral_list.append(None)
+
+    else:
+        # the spectral tests run in the pool while the batch is tested
+        if args.spectral_screen:
+            spectral_list = screen_spectral_tests(args, executor,
+                                                  parameter_list,
+                                                  spectral_cache)
+        else:
+            spectral_list = [
+                submit_spectral_test(args, executor, parameters,
+                                     spectral_cache)
+                for parameters in parameter_list
+            ]
+
+        batch_res = batch_tests.batch_results(parameter_list,
+                                              poker_width=args.poker_width)
+
+    items = list()
+    for (calc_count, parameters, period), sequence_res, spectral in zip(
+            batch, batch_res, spectral_list):
+        sequence_res = finish_sequence_test(
+            sequence_res, calc_count, max_count, parameters, spectral, period)
+        items.append((result_key(parameters), sequence_res))
+
+    return items
+
+def sequence_test(args, binary_sequence, calc_count=1, max_count=1,
+                  parameters=None, executor=None, spectral_cache=None,
+                  period=None):
     """
     Run a test on a binary sequence.
 
+    The statistical tests only take a moment, they run right here. Only the
+    spectral test is submitted to the executor, so with a worker pool it runs
+    while the statistical tests are calculated.
+
     """
-    num_proc = args.j
+    if executor is None:
+        executor = SweepExecutor()
+
+    spectral = submit_spectral_test(args, executor, parameters, spectral_cache)
 
-    general_results = list()
     general_results_dict = dict()
 
     cl.verbose("Performing MONOBIT test")
-    monobit_result = monobit.monobit_passed(binary_sequence)
-    general_results.append(monobit_result)
-    general_results_dict["monobit"] = monobit_result
+    general_results_dict["monobit"] = monobit.monobit_passed(binary_sequence)
 
     cl.verbose("Performing POKER test")
-    poker_result = poker.poker_passed(binary_sequence)
-    general_results.append(poker_result)
-    general_results_dict["poker"] = poker_result
+    general_results_dict["poker"] = poker.poker_passed(binary_sequence,
+                                                       args.poker_width)
 
     cl.verbose("Performing RUNS test")
-    runs_result = runs.runs_passed(binary_sequence, parallel=num_proc)
-    general_results.append(runs_result)
-    general_results_dict["runs"] = runs_result
+    general_results_dict["runs"] = runs.runs_passed(binary_sequence)
 
     cl.verbose("Performing LONG RUNS test")
-    long_runs_result = runs.long_runs_passed(binary_sequence, parallel=num_proc)
-    general_results.append(long_runs_result)
-    general_results_dict["long_runs"] = long_runs_result
+    general_results_dict["long_runs"] = runs.long_runs_passed(binary_sequence)
+
+    cl.verbose("Performing AUTOCORRELATION test")
+    general_results_dict["autocorrelation"] = ac.autocorrelation_passed(
+        binary_sequence, args.plot_ac)
+
+    longest_zero, longest_one = runs.longest_runs(binary_sequence)
+    general_results_dict["longest_runs"] = {
+        "zeros": longest_zero,
+        "ones": longest_one,
+    }
+
+    return finish_sequence_test(general_results_dict, calc_count, max_count,
+                                parameters, spectral, period)
+
+def fused_sequence_test(args, binary_sequence, calc_count=1, max_count=1,
+                        parameters=None, executor=None, spectral_cache=None,
+                        period=None):
+    """
+    Run a test on a binary sequence, with the four FIPS 140-1 tests fused.
+
+    Monobit, poker, runs and long runs are calculated from one pass over the
+    packed buffer. The results are the same as from sequence_test(), only the
+    spectral test is submitted to the executor.
+
+    """
+    if executor is None:
+        executor = SweepExecutor()
+
+    spectral = submit_spectral_test(args, executor, parameters, spectral_cache)
+
+    cl.verbose("Performing MONOBIT, POKER, RUNS and LONG RUNS test")
+    general_results_dict = fips.fips_passed(binary_sequence, args.poker_width)
 
     cl.verbose("Performing AUTOCORRELATION test")
-    autocorrelation_result = ac.autocorrelation_passed(binary_sequence,
-                                                       plot=args.plot_ac)
-    general_results.append(autocorrelation_result)
-    general_results_dict["autocorrelation"] = autocorrelation_result
+    general_results_dict["autocorrelation"] = ac.autocorrelation_passed(
+        binary_sequence, args.plot_ac)
+
+    return finish_sequence_test(general_results_dict, calc_count, max_count,
+                                parameters, spectral, period)
+
+def fail_fast_sequence_test(args, binary_sequence, calc_count=1,
+                            max_count=1, parameters=None, executor=None,
+                            spectral_cache=None, period=None):
+    """
+    Run a test on a binary sequence, but stop at the first failed test.
+
+    The tests run one after the other in FAIL_FAST_ORDER, with the spectral
+    test last for the lll engine. Once a test fails the verdict is decided,
+    the remaining tests are recorded as NOT_RUN.
+
+    """
+    if executor is None:
+        executor = SweepExecutor()
+
+    schedule = [test for test in FAIL_FAST_ORDER if test != "spectral"]
+    if parameters and args.spectral_engine == "lll":
+        schedule.append("spectral")
+    elif parameters:
+        schedule = FAIL_FAST_ORDER
+
+    general_results_dict = dict()
+    general_results_dict["longest_runs"] = NOT_RUN
+
+    for test in schedule:
+        if test == "monobit":
+            cl.verbose("Performing MONOBIT test")
+            passed = monobit.monobit_passed(binary_sequence)
+
+        elif test == "poker":
+            cl.verbose("Performing POKER test")
+            passed = poker.poker_passed(binary_sequence, args.poker_width)
+
+        elif test == "runs":
+            cl.verbose("Performing RUNS test")
+            passed = runs.runs_passed(binary_sequence)
+
+        elif test == "long_runs":
+            cl.verbose("Performing LONG RUNS test")
+            longest_zero, longest_one = runs.longest_runs(binary_sequence)
+            general_results_dict["longest_runs"] = {
+                "zeros": longest_zero,
+                "ones": longest_one,
+            }
+            passed = runs.long_runs_passed(binary_sequence)
+
+        elif test == "autocorrelation":
+            cl.verbose("Performing AUTOCORRELATION test")
+            passed = ac.autocorrelation_passed(binary_sequence,
+                                               args.plot_ac)
+
+        else:
+            spectral = submit_spectral_test(args, executor, parameters,
+                                            spectral_cache).get()
+            general_results_dict["spectral"] = spectral
+            passed = spectral["all_passed"]
+
+        if test != "spectral":
+            general_results_dict[test] = passed
+
+        if not passed:
+            break
+
+    for test in schedule:
+        if test not in general_results_dict:
+            cl.verbose("Verdict decided, {} test not run".format(test))
+            general_results_dict[test] = NOT_RUN
+
+    return finish_sequence_test(general_results_dict, calc_count, max_count,
+                                parameters, period=period)
+
+def spectral_engine(args):
+    """
+    Return the spectral test function chosen in args and its arguments after
+    the parameters and the dimension.
+
+    """
+    if args.spectral_engine == "lll":
+        return lll.spectral_test, (args.spectral_budget,)
+
+    return st.spectral_test, ()
+
+def submit_spectral_test(args, executor, parameters, spectral_cache=None):
+    """
+    Submit the spectral test, if there are parameters. With a cache, known
+    results are taken from there.
+
+    """
+    if not parameters:
+        return None
+
+    cl.verbose("Performing SPECTRAL test")
+
+    function, extra = spectral_engine(args)
+
+    if spectral_cache is None:
+        return executor.submit(function, parameters, args.spectral_dimensions,
+                               *extra)
+
+    return spectral_cache.submit(executor, parameters,
+                                 args.spectral_dimensions, function, extra)
+
+def screen_spectral_tests(args, executor, parameter_list,
+                          spectral_cache=None):
+    """
+    Calculate v2 for a list of parameter sets with the same modulus at once.
+    Only the parameter sets with v2 > 2**15 get the full spectral test.
+
+    Returns a list of handles like submit_spectral_test().
+
+    """
+    m = parameter_list[0]["m"]
+
+    cl.verbose("Screening {} multipliers in two dimensions".format(
+        len(parameter_list)))
+    nu2_squared = st.spectral_v2_batch(
+        [parameters["a"] for parameters in parameter_list], m)
+
+    spectral_list = list()
+    for parameters, s in zip(parameter_list, nu2_squared):
+        if s > 2**30:
+            spectral_list.append(
+                submit_spectral_test(args, executor, parameters,
+                                     spectral_cache))
+        else:
+            spectral_list.append(SweepExecutor().submit(
+                st.v2_results, int(s), args.spectral_dimensions))
+
+    return spectral_list
+
+def finish_sequence_test(general_results_dict, calc_count=1, max_count=1,
+                         parameters=None, spectral=None, period=None):
+    """
+    Collect the spectral test (if there are parameters) and report the
+    results of a sequence test.
+
+    spectral is the handle from submit_spectral_test(), it is needed with
+    parameters unless the results already contain the spectral test (or
+    NOT_RUN), those are kept.
+    Tests that are NOT_RUN don't count as passed. Without max_count only the
+    calc_count is reported. With parameters the period of the LCG is added as
+    well (None if it is not known).
+
+    """
+    general_results = [general_results_dict[test] for test in STATISTICAL_TESTS]
 
     count = 0
+    not_run = 0
     for res in general_results:
         if res is True:
             count += 1
+        elif res == NOT_RUN:
+            not_run += 1
     if parameters:
         source = "parameters {}".format(parameters)
     else:
         source = "random data from file"
 
+    passes = "{}/{} passes".format(count, len(general_results))
+    if not_run:
+        passes += ", {} not run".format(not_run)
+
+    if max_count is None:
+        progress = "[{}]".format(calc_count)
+    else:
+        progress = "[{} of {}]".format(calc_count, max_count)
+
     # generate info strings
-    if np.all(general_results):
-        stat_result = ("[{} of {}]: \u001b[32;1m({}/{} passes) statistical "
-                       "tests PASSED\u001b[0m".format(calc_count, max_count,
-                                                count, len(general_results)))
+    if not not_run and np.all(general_results):
+        stat_result = ("{}: \u001b[32;1m({}) statistical tests "
+                       "PASSED\u001b[0m".format(progress, passes))
     else:
-        stat_result = ("[{} of {}]: \u001b[31;1m({}/{} passes) statistical "
-                       "tests FAILED\u001b[0m".format(calc_count, max_count,
-                                                count, len(general_results)))
+        stat_result = ("{}: \u001b[31;1m({}) statistical tests "
+                       "FAILED\u001b[0m".format(progress, passes))
 
     spectral_res = ""
     if parameters:
-        cl.verbose("Performing SPECTRAL test")
-        spectral_test = st.SpectralTest(parameters, T=5)
-        spectral_result = spectral_test.get_results()
+        if "spectral" in general_results_dict:
+            spectral_result = general_results_dict["spectral"]
+        else:
+            spectral_result = spectral.get()
         general_results_dict["spectral"] = spectral_result
 
-        if spectral_result["all_passed"]:
+        general_results_dict["period"] = period
+        cl.verbose("Period of the LCG is {}".format(period))
+
+        if spectral_result == NOT_RUN:
+            spectral_res = " || spectral test not run"
+        elif spectral_result["all_passed"]:
             spectral_res = " || \u001b[32;1mspectral test PASSED\u001b[0m"
         else:
             spectral_res = " || \u001b[31;1mspectral test FAILED\u001b[0m"
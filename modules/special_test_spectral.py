@@ -3,17 +3,24 @@
 Performs the spectral test.
 
 """
-import sys
+import math
 import numpy as np
 
 from util.logging.logger import CoreLog as cl
 
+# moduli below this are handled with int64 in spectral_v2_batch()
+V2_INT64_MAX_MODULUS = 2**31
+
 class SpectralTest:
     """
     Performs the spectral test.
 
     We follow D. Knuth, pp.98
 
+    All arithmetic is done with Python integers, so the results are exact for
+    any modulus. Every step returns the step that follows it, _run() walks
+    through them in a loop instead of recursing.
+
     """
     def __init__(self, parameters, T=3):
         """
@@ -21,60 +28,55 @@ class SpectralTest:
 
         """
         cl.debug("Calling spectral_test with parameters {}".format(parameters))
-        old_recursion_limit = sys.getrecursionlimit()
-        cl.debug("Recursion limit is set to {}".format(old_recursion_limit))
-        new_recursion_limit = 10000
-        if old_recursion_limit < new_recursion_limit:
-            cl.debug("Setting recursion limit to {}".format(new_recursion_limit))
-            sys.setrecursionlimit(new_recursion_limit)
-        else:
-            cl.debug("Recursion limit is sufficient")
 
         self._T = T
 
-        self.par_x0 = parameters["x0"]
-        self.par_a = parameters["a"]
-        self.par_c = parameters["c"]
-        self.par_m = parameters["m"]
+        self.par_x0 = int(parameters["x0"])
+        self.par_a = int(parameters["a"])
+        self.par_c = int(parameters["c"])
+        self.par_m = int(parameters["m"])
 
         self.results = [None] * (T+1)
 
+        # exact squares of the results
+        self.nu_squared = [None] * (T+1)
+
         # calc v2 and prepare everything for higher dimensionality
-        self._step_1()
+        self._run(self._step_1)
 
         # calc higher dimensional v values
         while (self._t < self._T):
-            self._step_4()
+            self._run(self._step_4)
 
     def get_results(self):
         """
         Return the results list.
 
         """
-        all_passed = True
-
-        resdict = dict()
+        return spectral_results(self.results)
 
-        for t, v in enumerate(self.results):
-
-            if (t < 2):
-                pass
+    def _run(self, step):
+        """
+        Perform steps until one of them has no successor.
 
-            else:
-                key = "v{}".format(t)
-                resdict[key] = dict()
-                resdict[key]["value"] = v
+        """
+        while step is not None:
+            step = step()
 
-                if (v > 2**(30/t)):
-                    resdict[key]["pass"] = True
+    def _output(self):
+        """
+        Store v_t for the current dimension.
 
-                else:
-                    resdict[key]["pass"] = False
-                    all_passed = False
+        """
+        t = self._t
+        vt = math.sqrt(self._s)
+        bound = 2**(30/t)
 
-        resdict["all_passed"] = all_passed
+        verdict = "\u001b[32;1mpassed\u001b[0m" if vt > bound else "\u001b[31;1mfailed\u001b[0m"
+        cl.verbose("Test for {} dimensions passed when v{} = {:.2f} > {:.2f}, so it {}".format(t, t, vt, bound, verdict))
 
-        return resdict
+        self.nu_squared[t] = self._s
+        self.results[t] = vt
 
     def _step_1(self):
         """
@@ -107,7 +109,7 @@ class SpectralTest:
         )
 
         # go to step 2
-        self._step_2()
+        return self._step_2
 
     def _step_2(self):
         """
@@ -116,7 +118,13 @@ class SpectralTest:
         """
         cl.debug("Step 2 (Euclidean step)")
 
-        self._q = np.floor(self._hprime / self._h)
+        if self._h == 0:
+            # a and m are not coprime and the remainder vanished, (h', p') is
+            # as short as it gets
+            self._output()
+            return self._intermediate_step_3
+
+        self._q = self._hprime // self._h
 
         self._u = self._hprime - self._q * self._h
         self._v = self._pprime - self._q * self._p
@@ -132,10 +140,9 @@ class SpectralTest:
             self._p = self._v
 
             # redo step 2
-            self._step_2()
+            return self._step_2
 
-        else:
-            self._step_3()
+        return self._step_3
 
     def _step_3(self):
         """
@@ -155,14 +162,10 @@ class SpectralTest:
             self._hprime = self._u
             self._pprime = self._v
 
-            self._step_3()
+            return self._step_3
 
-        else:
-            v2 = np.sqrt(self._s)
-            verdict = "\u001b[32;1mpassed\u001b[0m" if v2 > 2**15 else "\u001b[31;1mfailed\u001b[0m"
-            cl.verbose("Test for 2 dimensions passed when v2 = {:.2f} > {}, so it {}".format(v2, 2**15, verdict))
-            self.results[self._t] = v2
-            self._intermediate_step_3()
+        self._output()
+        return self._intermediate_step_3
 
     def _intermediate_step_3(self):
         """
@@ -170,17 +173,18 @@ class SpectralTest:
 
         """
         cl.debug("Intermediate step, preparing matrices for higher dimensions")
-        self._mat_U = np.asarray([
+        self._mat_U = [
             [ -1*self._h      , +1*self._p      ],
             [ -1*self._hprime , +1*self._pprime ]
-        ])
+        ]
 
         prefactor = -1 if self._pprime > 0 else +1
-        self._mat_V = prefactor * np.asarray([
-            [ +1*self._pprime , +1*self._hprime ],
-            [ -1*self._p      , -1*self._h      ]
-        ])
-        # self._step_4()
+        self._mat_V = [
+            [ prefactor * self._pprime , prefactor * self._hprime ],
+            [ -prefactor * self._p     , -prefactor * self._h     ]
+        ]
+
+        return None
 
     def _step_4(self):
         """
@@ -193,41 +197,33 @@ class SpectralTest:
         cl.debug("Calculating v{}".format(self._t))
 
         # enlarge matrices
-        shape_u_x, shape_u_y = self._mat_U.shape
-        U = np.zeros( (shape_u_x + 1, shape_u_y + 1) )
-        U[:shape_u_x, :shape_u_y] = self._mat_U
-        self._mat_U = U.copy()
-
-        shape_v_x, shape_v_y = self._mat_V.shape
-        V = np.zeros( (shape_v_x + 1, shape_v_y + 1) )
-        V[:shape_v_x, :shape_v_y] = self._mat_V
-        self._mat_V = V.copy()
+        for row in self._mat_U + self._mat_V:
+            row.append(0)
 
         self._r = (self.par_a * self._r) % self.par_m
 
-        Ut = np.zeros( (1, self._t) )
-        Ut[0, 0] = -1*self._r
-        Ut[0, -1] = 1
-
-        Vt = np.zeros( (1, self._t) )
-        Vt[0, -1] = self.par_m
+        Ut = [0] * self._t
+        Ut[0] = -1*self._r
+        Ut[-1] = 1
 
-        self._mat_U[self._t - 1, :] = Ut
-        self._mat_V[self._t - 1, :] = Vt
+        Vt = [0] * self._t
+        Vt[-1] = self.par_m
 
         for i in range(self._t - 1):
-            self._q = np.round(self._mat_V[i, 0] * self._r / self.par_m)
-            self._mat_V[i, self._t - 1] = self._mat_V[i, 0] * self._r - self._q * self.par_m
-            self._mat_U[self._t - 1, :] = self._mat_U[self._t - 1, :] + self._q * self._mat_U[i, :]
+            self._q = round_div(self._mat_V[i][0] * self._r, self.par_m)
+            self._mat_V[i][self._t - 1] = self._mat_V[i][0] * self._r - self._q * self.par_m
+            Ut = [u + self._q * ui for u, ui in zip(Ut, self._mat_U[i])]
 
-        Ut = self._mat_U[self._t - 1, :]
-        self._s = np.min( [self._s, (Ut @ Ut) ])
+        self._mat_U.append(Ut)
+        self._mat_V.append(Vt)
+
+        self._s = min(self._s, _dot(Ut, Ut))
 
         # adjust indices by 1
         self._k = self._t - 1
         self._j = 1 - 1
 
-        self._step_5()
+        return self._step_5
 
     def _step_5(self):
         """
@@ -238,16 +234,22 @@ class SpectralTest:
 
         for i in range(self._t):
 
-            ViVj = (self._mat_V[i, :] @ self._mat_V[self._j, :])
-            VjVj = (self._mat_V[self._j, :] @ self._mat_V[self._j, :])
+            Vi = self._mat_V[i]
+            Vj = self._mat_V[self._j]
+
+            ViVj = _dot(Vi, Vj)
+            VjVj = _dot(Vj, Vj)
 
-            if not (i == self._j) and (2 * np.abs(ViVj) > VjVj):
-                self._q = np.round(ViVj / VjVj)
-                self._mat_V[ i       , : ] = self._mat_V[ i       , : ] - self._q * self._mat_V[ self._j , : ]
-                self._mat_U[ self._j , : ] = self._mat_U[ self._j , : ] + self._q * self._mat_U[ i       , : ]
+            if not (i == self._j) and (2 * abs(ViVj) > VjVj):
+                self._q = round_div(ViVj, VjVj)
+                self._mat_V[i] = [vi - self._q * vj for vi, vj in zip(Vi, Vj)]
+                self._mat_U[self._j] = [
+                    uj + self._q * ui
+                    for uj, ui in zip(self._mat_U[self._j], self._mat_U[i])
+                ]
                 self._k = self._j
 
-        self._step_6()
+        return self._step_6
 
     def _step_6(self):
         """
@@ -256,10 +258,10 @@ class SpectralTest:
         """
         cl.debug("Step 6 (Examine new bound)")
         if (self._k == self._j):
-            value = self._mat_U[self._j, :] @ self._mat_U[self._j, :]
-            self._s = np.min([self._s, value])
+            Uj = self._mat_U[self._j]
+            self._s = min(self._s, _dot(Uj, Uj))
 
-        self._step_7()
+        return self._step_7
 
     def _step_7(self):
         """
@@ -274,9 +276,9 @@ class SpectralTest:
             self._j += 1
 
         if not (self._j == self._k):
-            self._step_5()
-        else:
-            self._step_8()
+            return self._step_5
+
+        return self._step_8
 
     def _step_8(self):
         """
@@ -285,63 +287,238 @@ class SpectralTest:
         """
         cl.debug("Step 8 (Prepare for search)")
 
-        self._X = np.zeros((1, self._t))
-        self._Y = np.zeros((1, self._t))
-        self._Z = np.zeros((1, self._t))
+        self._X = [0] * self._t
+        self._Y = [0] * self._t
+        self._Z = [0] * self._t
 
         self._k = self._t - 1
 
+        mm = self.par_m * self.par_m
         for j in range(self._t):
-            VjVj = self._mat_V[j, :].T @ self._mat_V[j, :]
-            self._Z[0, j] = np.floor(np.sqrt(np.floor(VjVj * self._s / self.par_m / self.par_m)))
+            Vj = self._mat_V[j]
+            self._Z[j] = math.isqrt(_dot(Vj, Vj) * self._s // mm)
 
-        self._step_9()
+        return self._search
 
-    def _step_9(self):
+    def _search(self):
         """
-        Step 9.
+        Steps 9 to 11, the search for the shortest vector.
+
+        These steps only jump between each other and may run very often, so
+        they are done in one loop with local variables.
 
         """
-        cl.debug("Step 9 (Advance x_k)")
+        cl.debug("Steps 9 to 11 (Search)")
+
+        t = self._t
+        U = self._mat_U
+        X = self._X
+        Y = self._Y
+        Z = self._Z
+        k = self._k
+        s = self._s
+
+        step = 9
+        while True:
+            if step == 9:
+                # step 9 (advance x_k)
+                if X[k] == Z[k]:
+                    step = 11
+                else:
+                    X[k] += 1
+                    Y = [y + u for y, u in zip(Y, U[k])]
+                    step = 10
 
-        if (self._X[0, self._k] == self._Z[0, self._k]):
-            self._step_11()
-        else:
-            self._X[0, self._k] += 1
-            self._Y[0, :] = self._Y[0, :] + self._mat_U[self._k, :]
-            self._step_10()
+            elif step == 10:
+                # step 10 (advance k)
+                k += 1
 
-    def _step_10(self):
-        """
-        Step 10.
+                if k <= t - 1:
+                    X[k] = -Z[k]
+                    Y = [y - 2 * Z[k] * u for y, u in zip(Y, U[k])]
+                else:
+                    s = min(s, _dot(Y, Y))
+                    step = 11
 
-        """
-        cl.debug("Step 10 (Advance k)")
+            else:
+                # step 11 (decrease k)
+                k -= 1
+
+                if k >= 0:      # adjusted index
+                    step = 9
+                else:
+                    break
 
-        self._k += 1
+        self._X = X
+        self._Y = Y
+        self._k = k
+        self._s = s
 
-        if (self._k <= self._t - 1):
-            self._X[0, self._k] = -1*self._Z[0, self._k]
-            self._Y[0, :] = self._Y[0, :] - 2 * self._Z[0, self._k] * self._mat_U[self._k, :]
-            self._step_10()
-        else:
-            value = self._Y[0, :].T @ self._Y[0, :]
-            self._s = np.min([self._s, value])
-            self._step_11()
+        self._output()
+        return None
 
-    def _step_11(self):
-        """
-        Step 11.
+def _dot(x, y):
+    """
+    Exact dot product of two integer vectors.
 
-        """
-        cl.debug("Step 11 (Decrease k)")
+    """
+    return sum(xi * yi for xi, yi in zip(x, y))
+
+def round_div(x, y):
+    """
+    x / y rounded to the nearest integer, ties to even like np.round.
+
+    """
+    if y < 0:
+        x, y = -x, -y
 
-        self._k -= 1
+    q, r = divmod(x, y)
+
+    if 2 * r > y or (2 * r == y and q % 2 == 1):
+        q += 1
+
+    return q
+
+def spectral_results(results):
+    """
+    Dictionary with the value and the verdict of every v_t in results (a list
+    indexed by t, starting at t=2).
+
+    """
+    all_passed = True
+
+    resdict = dict()
+
+    for t, v in enumerate(results):
+
+        if (t < 2):
+            pass
 
-        if (self._k >= 0):       # adjusted index
-            self._step_9()
         else:
-            vt = np.sqrt(self._s)
-            verdict = "\u001b[32;1mpassed\u001b[0m" if vt > 2**(30/self._t) else "\u001b[31;1mfailed\u001b[0m"
-            cl.verbose("Test for {} dimensions passed when v{} = {:.2f} > {:.2f}, so it {}".format(self._t, self._t, vt, 2**(30/self._t), verdict))
-            self.results[self._t] = np.sqrt(self._s)
+            key = "v{}".format(t)
+            resdict[key] = dict()
+            resdict[key]["value"] = v
+
+            if (v > 2**(30/t)):
+                resdict[key]["pass"] = True
+
+            else:
+                resdict[key]["pass"] = False
+                all_passed = False
+
+    resdict["all_passed"] = all_passed
+
+    return resdict
+
+def spectral_v2_batch(a_array, m):
+    """
+    Calculate v2^2 for many multipliers and one modulus at once.
+
+    Steps 1 to 3 run side by side for all multipliers on NumPy arrays, every
+    iteration only works on the multipliers that are not finished yet. The
+    results are exact, int64 for moduli below V2_INT64_MAX_MODULUS, Python
+    integers in an object array otherwise.
+
+    """
+    if m < V2_INT64_MAX_MODULUS:
+        a = np.asarray(a_array, dtype=np.int64) % m
+    else:
+        a = np.asarray([int(x) % m for x in a_array], dtype=object)
+
+    # step 1 (initialization)
+    h = a.copy()
+    hprime = np.full_like(a, m)
+    p = np.ones_like(a)
+    pprime = np.zeros_like(a)
+    s = 1 + a * a
+
+    step_3 = list()
+
+    # step 2 (Euclidean step) for the multipliers in idx
+    idx = np.arange(len(a))
+    while len(idx) > 0:
+        # a remainder of zero ends the Euclidean algorithm
+        idx = idx[h[idx] != 0]
+
+        q = hprime[idx] // h[idx]
+        u = hprime[idx] - q * h[idx]
+        v = pprime[idx] - q * p[idx]
+        distsq = u * u + v * v
+
+        better = distsq < s[idx]
+
+        # on to step 3
+        step_3.append((idx[~better], u[~better], v[~better]))
+
+        # redo step 2
+        idx = idx[better]
+        s[idx] = distsq[better]
+        hprime[idx] = h[idx]
+        h[idx] = u[better]
+        pprime[idx] = p[idx]
+        p[idx] = v[better]
+
+    # step 3 (compute v2)
+    for idx, u, v in step_3:
+        while len(idx) > 0:
+            u = u - h[idx]
+            v = v - p[idx]
+            distsq = u * u + v * v
+
+            better = distsq < s[idx]
+
+            idx = idx[better]
+            u = u[better]
+            v = v[better]
+            s[idx] = distsq[better]
+
+    return s
+
+def v2_results(nu2_squared, T=5):
+    """
+    Results in the format of SpectralTest.get_results() for a multiplier
+    that failed in two dimensions already.
+
+    The higher dimensions are not calculated, their value is None. The
+    results are marked as screened, so they are not cached.
+
+    """
+    resdict = dict()
+
+    v2 = math.sqrt(nu2_squared)
+    resdict["v2"] = {"value": v2, "pass": bool(v2 > 2**15)}
+
+    for t in range(3, T+1):
+        resdict["v{}".format(t)] = {"value": None, "pass": False}
+
+    resdict["all_passed"] = False
+    resdict["screened"] = True
+
+    return resdict
+
+def canonical_multiplier(a, m):
+    """
+    Smallest multiplier with the same spectral test results as a.
+
+    With m - a the coordinates of the lattice only change their signs, with
+    the inverse of a (if there is one) their order is reversed, so all of
+    a, m - a, 1/a and m - 1/a (mod m) have the same v_t in every dimension.
+
+    """
+    a = a % m
+    candidates = [a, (m - a) % m]
+
+    if math.gcd(a, m) == 1:
+        inverse = pow(a, -1, m)
+        candidates += [inverse, (m - inverse) % m]
+
+    return min(candidates)
+
+def spectral_test(parameters, T=5):
+    """
+    Perform the spectral test up to T dimensions.
+
+    Returns the results from SpectralTest.get_results().
+
+    """
+    return SpectralTest(parameters, T=T).get_results()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Performs the spectral test in many dimensions, with a reduced lattice basis.
+
+"""
+import math
+import time
+
+from util.logging.logger import CoreLog as cl
+
+import modules.special_test_spectral as st
+
+# Lovasz condition of the LLL reduction, delta = 99/100
+LLL_DELTA = (99, 100)
+
+# number of enumeration nodes between two looks at the clock
+BUDGET_CHECK_INTERVAL = 4096
+
+# relative slack of the floating point bound in the enumeration, candidates
+# are always compared with their exact length
+ENUMERATION_SLACK = 1e-9
+
+class LLLSpectralTest:
+    """
+    Performs the spectral test with LLL reduction and enumeration.
+
+    For every dimension t the basis of the dual lattice of all s with
+    s_1 + a*s_2 + ... + a^(t-1)*s_t = 0 mod m is LLL reduced in exact integer
+    arithmetic (H. Cohen, Algorithm 2.6.7). The shortest vector is then found
+    by Schnorr-Euchner enumeration. This gets a lot further than Knuth's
+    search in SpectralTest, which is stuck at about five dimensions.
+
+    With a time budget (in seconds) the enumeration stops once the budget is
+    used up. v_t is then only an upper bound, the length of the shortest
+    vector found so far, and exact[t] is False.
+
+    """
+    def __init__(self, parameters, T=16, time_budget=None):
+        """
+        Perform the test up to T dimensions.
+
+        """
+        cl.debug("Calling LLL spectral test with parameters {}".format(
+            parameters))
+
+        self._T = T
+
+        self.par_x0 = int(parameters["x0"])
+        self.par_a = int(parameters["a"])
+        self.par_c = int(parameters["c"])
+        self.par_m = int(parameters["m"])
+
+        self.results = [None] * (T+1)
+        self.nu_squared = [None] * (T+1)
+        self.exact = [None] * (T+1)
+
+        self._deadline = None
+        if time_budget is not None:
+            self._deadline = time.perf_counter() + time_budget
+
+        for t in range(2, T+1):
+            self._dimension(t)
+
+    def get_results(self):
+        """
+        Return the results in the format of SpectralTest.get_results(), with
+        "exact" telling if all values are exact.
+
+        """
+        resdict = st.spectral_results(self.results)
+        resdict["exact"] = all(self.exact[2:])
+
+        return resdict
+
+    def _dimension(self, t):
+        """
+        Calculate v_t.
+
+        """
+        cl.debug("Calculating v{}".format(t))
+
+        basis = dual_basis(self.par_a, self.par_m, t)
+        d, lam = lll_reduce(basis)
+
+        s, exact = shortest_vector(basis, d, lam, self._deadline)
+
+        vt = math.sqrt(s)
+        bound = 2**(30/t)
+
+        if not exact:
+            cl.verbose_warning("Time budget used up, v{} = {:.2f} is only an "
+                               "upper bound".format(t, vt))
+
+        verdict = "\u001b[32;1mpassed\u001b[0m" if vt > bound else "\u001b[31;1mfailed\u001b[0m"
+        cl.verbose("Test for {} dimensions passed when v{} = {:.2f} > {:.2f}, so it {}".format(t, t, vt, bound, verdict))
+
+        self.nu_squared[t] = s
+        self.results[t] = vt
+        self.exact[t] = exact
+
+def dual_basis(a, m, t):
+    """
+    Basis of the dual lattice in t dimensions, one vector per row.
+
+    """
+    basis = [[0] * t for _ in range(t)]
+    basis[0][0] = m
+
+    for i in range(1, t):
+        basis[i][0] = -pow(a, i, m)
+        basis[i][i] = 1
+
+    return basis
+
+def lll_reduce(basis, delta=LLL_DELTA):
+    """
+    LLL reduce the rows of basis in place, in integer arithmetic.
+
+    Returns d and lam of the Gram-Schmidt orthogonalization of the reduced
+    basis: |b*_i|^2 = d[i+1] / d[i] and mu_ij = lam[i][j] / d[j+1].
+
+    """
+    n = len(basis)
+    num, den = delta
+
+    d = [1] + [0] * n
+    lam = [[0] * n for _ in range(n)]
+
+    def reduce(k, l):
+        # size reduce b_k with b_l
+        if 2 * abs(lam[k][l]) > d[l+1]:
+            q = st.round_div(lam[k][l], d[l+1])
+            basis[k] = [x - q * y for x, y in zip(basis[k], basis[l])]
+            lam[k][l] -= q * d[l+1]
+            for i in range(l):
+                lam[k][i] -= q * lam[l][i]
+
+    def swap(k, kmax):
+        # exchange b_k and b_(k-1)
+        basis[k], basis[k-1] = basis[k-1], basis[k]
+        for j in range(k-1):
+            lam[k][j], lam[k-1][j] = lam[k-1][j], lam[k][j]
+
+        lk = lam[k][k-1]
+        B = (d[k-1] * d[k+1] + lk * lk) // d[k]
+
+        for i in range(k+1, kmax+1):
+            t = lam[i][k]
+            lam[i][k] = (d[k+1] * lam[i][k-1] - lk * t) // d[k]
+            lam[i][k-1] = (B * t + lk * lam[i][k]) // d[k+1]
+
+        d[k] = B
+
+    d[1] = _dot(basis[0], basis[0])
+
+    k = 1
+    kmax = 0
+    while k < n:
+        if k > kmax:
+            # incremental Gram-Schmidt
+            kmax = k
+            for j in range(k+1):
+                u = _dot(basis[k], basis[j])
+                for i in range(j):
+                    u = (d[i+1] * u - lam[k][i] * lam[j][i]) // d[i]
+                if j < k:
+                    lam[k][j] = u
+                else:
+                    d[k+1] = u
+
+        reduce(k, k-1)
+
+        # Lovasz condition
+        lk = lam[k][k-1]
+        if den * d[k+1] * d[k-1] < num * d[k] * d[k] - den * lk * lk:
+            swap(k, kmax)
+            k = max(1, k-1)
+        else:
+            for l in range(k-2, -1, -1):
+                reduce(k, l)
+            k += 1
+
+    return d, lam
+
+def shortest_vector(basis, d, lam, deadline=None):
+    """
+    Squared length of the shortest non-zero vector of the lattice, with
+    Schnorr-Euchner enumeration over the LLL reduced basis.
+
+    Returns the squared length and whether the search was complete, it stops
+    early when the deadline (from time.perf_counter()) has passed.
+
+    """
+    n = len(basis)
+
+    # Gram-Schmidt data as floats, only used to prune the search
+    B = [d[i+1] / d[i] for i in range(n)]
+    mu = [[lam[i][j] / d[j+1] for j in range(i)] for i in range(n)]
+
+    best = min(_dot(b, b) for b in basis)
+    bound = best * (1 + ENUMERATION_SLACK)
+
+    x = [0] * n
+    dx = [0] * n
+    ddx = [0] * n
+    center = [0.0] * n
+    partial = [0.0] * (n+1)
+
+    nodes = 0
+    k = n - 1
+    while True:
+        nodes += 1
+        if (deadline is not None and nodes % BUDGET_CHECK_INTERVAL == 0
+                and time.perf_counter() > deadline):
+            return best, False
+
+        diff = x[k] - center[k]
+        length = partial[k+1] + diff * diff * B[k]
+
+        if length < bound:
+            if k > 0:
+                # go down one level, start at the integer closest to the
+                # center and zigzag around it
+                partial[k] = length
+                k -= 1
+                center[k] = -sum(x[j] * mu[j][k] for j in range(k+1, n))
+                x[k] = round(center[k])
+                dx[k] = ddx[k] = 1 if center[k] >= x[k] else -1
+                continue
+
+            if length > 0:
+                vector = [0] * n
+                for i in range(n):
+                    if x[i] != 0:
+                        vector = [v + x[i] * b for v, b in zip(vector, basis[i])]
+                distsq = _dot(vector, vector)
+                if 0 < distsq < best:
+                    best = distsq
+                    bound = best * (1 + ENUMERATION_SLACK)
+        else:
+            # go up one level
+            k += 1
+            if k == n:
+                return best, True
+
+        # next value of x_k, only one sign while everything above is zero
+        if partial[k+1] == 0:
+            x[k] += 1
+        else:
+            x[k] += dx[k]
+            ddx[k] = -ddx[k]
+            dx[k] = ddx[k] - dx[k]
+
+def spectral_test(parameters, T=16, time_budget=None):
+    """
+    Perform the spectral test up to T dimensions with LLL reduction.
+
+    Returns the results from LLLSpectralTest.get_results().
+
+    """
+    return LLLSpectralTest(parameters, T=T,
+                           time_budget=time_budget).get_results()
+
+def _dot(x, y):
+    return sum(xi * yi for xi, yi in zip(x, y))
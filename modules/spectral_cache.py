@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Cache the results of the spectral test.
+
+"""
+import collections
+
+import modules.special_test_spectral as st
+
+from modules.results_store import ResultsStore
+from util.logging.logger import CoreLog as cl
+
+# number of results kept in memory
+CACHE_SIZE = 2**16
+
+class SpectralCache:
+    """
+    Results of the spectral test, stored under (a, m, T).
+
+    The spectral test only depends on the multiplier and the modulus, so all
+    parameter sets that only differ in x0 or c share one result. So do the
+    multipliers a, m - a and their inverses, see canonical_multiplier().
+
+    Recently used results are kept in memory, least recently used ones are
+    dropped first. With a path all results are also stored on disk, so they
+    are shared between sweeps.
+
+    """
+    def __init__(self, path=None, size=CACHE_SIZE):
+        """
+        Open the cache, on disk at path (if given).
+
+        """
+        self._memory = collections.OrderedDict()
+        self._size = size
+
+        self._store = None
+        if path is not None:
+            self._store = ResultsStore(path)
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, key):
+        if key in self._memory:
+            return True
+        return self._store is not None and key in self._store
+
+    def close(self):
+        """
+        Close the disk tier and report the hit rate.
+
+        """
+        if self.lookups():
+            cl.info(self.report())
+
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    @staticmethod
+    def key(parameters, T):
+        """
+        Key of the spectral test for the parameters up to T dimensions.
+
+        Multipliers with the same results share the key of the canonical one.
+
+        """
+        m = parameters["m"]
+        return (st.canonical_multiplier(parameters["a"], m), m, T)
+
+    @staticmethod
+    def cacheable(results):
+        """
+        Check if results can be cached. Results that are only upper bounds
+        (not exact) or that stop at two dimensions (screened) can't.
+
+        """
+        return results.get("exact", True) and not results.get("screened",
+                                                                False)
+
+    def get(self, key):
+        """
+        Return the cached results for key, or None.
+
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+
+        if self._store is not None and key in self._store:
+            results = self._store.get(key)
+            self._remember(key, results)
+            self.disk_hits += 1
+            return results
+
+        self.misses += 1
+        return None
+
+    def put(self, key, results):
+        """
+        Store the results for key.
+
+        """
+        self.put_many([(key, results)])
+
+    def put_many(self, items):
+        """
+        Store a list of (key, results) pairs, on disk in one transaction.
+
+        """
+        for key, results in items:
+            self._remember(key, results)
+
+        if self._store is not None:
+            self._store.put_many(items)
+
+    def submit(self, executor, parameters, T, function=st.spectral_test,
+               extra=()):
+        """
+        Look the spectral test for the parameters up, or submit
+        function(parameters, T, *extra) to the executor. Returns a handle, its
+        get() method returns the results.
+
+        Results that are calculated are added to the cache, unless they are
+        not cacheable().
+
+        """
+        key = self.key(parameters, T)
+
+        results = self.get(key)
+        if results is not None:
+            return _Hit(results)
+
+        return _Miss(self, key,
+                     executor.submit(function, parameters, T, *extra))
+
+    def lookups(self):
+        """
+        Number of lookups so far.
+
+        """
+        return self.memory_hits + self.disk_hits + self.misses
+
+    def report(self):
+        """
+        Return a summary of the hit rate.
+
+        """
+        hits = self.memory_hits + self.disk_hits
+
+        return ("Spectral cache: {} of {} lookups hit ({:.1f} %), {} in "
+                "memory and {} on disk".format(
+                    hits, self.lookups(), 100 * hits / self.lookups(),
+                    self.memory_hits, self.disk_hits))
+
+    def _remember(self, key, results):
+        self._memory[key] = results
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self._size:
+            self._memory.popitem(last=False)
+
+class _Hit:
+    """
+    Handle for results from the cache.
+
+    """
+    def __init__(self, results):
+        self._results = results
+
+    def get(self):
+        return self._results
+
+class _Miss:
+    """
+    Handle for a submitted spectral test, the results go into the cache.
+
+    """
+    def __init__(self, cache, key, handle):
+        self._cache = cache
+        self._key = key
+        self._handle = handle
+        self._done = False
+
+    def get(self):
+        results = self._handle.get()
+
+        if not self._done and self._cache.cacheable(results):
+            self._cache.put(self._key, results)
+            self._done = True
+
+        return results
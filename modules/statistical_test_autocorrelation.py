@@ -6,10 +6,15 @@ Perform autocorrelation tests.
 import numpy as np
 from matplotlib import pyplot as plt
 
-import multiprocessing
-from itertools import repeat
-
 from util.logging.logger import CoreLog as cl
+from modules.bit_sequence import as_bit_sequence
+
+# number of bits that are compared for every shift
+WINDOW = 5000
+
+# the XOR sum has to be strictly between these bounds
+LOWER_BOUND = 2326
+UPPER_BOUND = 2674
 
 def autocorrelate_tau(bin_seq, tau):
     """
@@ -20,40 +25,71 @@ def autocorrelate_tau(bin_seq, tau):
     http://noosphere.princeton.edu/bitwise.autocorrelation.html
 
     """
-    seq1 = bin_seq[0:5000]
-    seq2 = bin_seq[tau:tau+5000]
+    seq1 = bin_seq[0:WINDOW]
+    seq2 = bin_seq[tau:tau+WINDOW]
     return np.sum(seq1 ^ seq2)  # XOR of two lists
 
-def autocorrelation_passed(binary_sequence, plot=False):
+def autocorrelation_all(binary_sequence, max_tau=None):
     """
-    Returns if the binary sequence passes the autocorrelation test.
+    XOR sums for all shifts tau in [1, max_tau) at once.
+
+    Entry tau - 1 of the result is autocorrelate_tau(bits, tau). max_tau
+    defaults to a quarter of the sequence length.
 
     """
-    test_passed = True
+    bits = as_bit_sequence(binary_sequence).bits()
+
+    if max_tau is None:
+        max_tau = int(len(bits) / 4)
 
-    b = np.asarray(list(binary_sequence), dtype=int)
+    return xor_sums(bits, max_tau)
 
-    seqset = int(len(binary_sequence) / 4)
-    tau = range(1, seqset)
+def xor_sums(bits, max_tau):
+    """
+    XOR sums of the first WINDOW bits with the bits shifted by tau, for all
+    tau in [1, max_tau), along the last axis of an array of bits.
 
-    with multiprocessing.Pool(4) as p:
-        res = p.starmap(autocorrelate_tau, zip(repeat(b), tau))
+    With b1 ^ b2 = b1 + b2 - 2*b1*b2 the sums of the products for every tau
+    are a cross correlation, which is calculated with one FFT.
+
+    """
+    bits = np.asarray(bits, dtype=np.float64)
+    length = bits.shape[-1]
 
-    failcount = 0
+    if length < max_tau - 1 + WINDOW:
+        raise ValueError("Binary sequence of length {} is too short for "
+                         "shifts up to {}".format(length, max_tau - 1))
 
-    plot_x = list()
-    plot_y = list()
+    tau = np.arange(1, max_tau)
+    window = bits[..., :WINDOW]
 
-    for t, ctau in enumerate(res):
+    # zero padding, so the circular correlation does not wrap around
+    n = 1 << (length + WINDOW - 1).bit_length()
+    correlation = np.fft.irfft(
+        np.conj(np.fft.rfft(window, n)) * np.fft.rfft(bits, n), n)
+    products = np.rint(correlation[..., tau])
+
+    cumulative = np.cumsum(bits, axis=-1)
+    cumulative = np.concatenate(
+        (np.zeros(bits.shape[:-1] + (1,)), cumulative), axis=-1)
+    shifted_sums = cumulative[..., tau + WINDOW] - cumulative[..., tau]
+
+    window_sums = window.sum(axis=-1, keepdims=True)
+
+    return (window_sums + shifted_sums - 2 * products).astype(np.int64)
+
+def autocorrelation_passed(binary_sequence, plot=False):
+    """
+    Returns if the binary sequence passes the autocorrelation test.
+
+    """
+    res = autocorrelation_all(binary_sequence)
+    tau = np.arange(1, len(res) + 1)
 
-        plot_x.append(t+1)
-        plot_y.append(ctau)
+    failed = ~((LOWER_BOUND < res) & (res < UPPER_BOUND))
+    failcount = int(np.sum(failed))
 
-        if not (2326 < ctau) or not (ctau < 2674):
-            # cl.verbose_warning("Autocorrelation test failed for tau = {}, "
-            #                    "2326 !< {} !< 2674".format(t, ctau))
-            test_passed = False
-            failcount += 1
+    test_passed = (failcount == 0)
 
     if test_passed:
         cl.verbose("Autocorrelation test passed, no correlations found")
@@ -64,8 +100,8 @@ def autocorrelation_passed(binary_sequence, plot=False):
 
     if plot:
         plt.figure()
-        plt.plot(plot_x, plot_y, zorder=0)
-        plt.hlines([2326, 2500, 2674], xmin=0, xmax=5000, color="r", linestyle="dashed", zorder=1)
+        plt.plot(tau, res, zorder=0)
+        plt.hlines([LOWER_BOUND, WINDOW/2, UPPER_BOUND], xmin=0, xmax=WINDOW, color="r", linestyle="dashed", zorder=1)
         plt.xlabel(r"Indexshift $n$")
         plt.ylabel(r"$X_{n} = \sum_{j} b_j \oplus b_{j+n}$")
         plt.xlim([-1, 5001])
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Performs the four FIPS 140-1 tests (monobit, poker, runs and long runs) in
+one go.
+
+http://csrc.nist.gov/publications/fips/fips1401.htm
+
+"""
+import numpy as np
+
+import modules.statistical_test_monobit as monobit
+import modules.statistical_test_poker as poker
+import modules.statistical_test_runs as runs
+
+from modules.bit_sequence import as_bit_sequence
+
+# longest run that fits inside a byte without touching its edges
+INNER_RUN_LENGTH = 6
+
+def byte_tables():
+    """
+    Lookup tables over the 256 byte values.
+
+    Returns the number of ones, the counts of the two 4 bit poker blocks, the
+    length of the leading run, the length of the trailing run (0 if the byte
+    is one run) and the histogram of the runs that touch neither edge of the
+    byte, flattened from [bit value, length].
+
+    """
+    byte_bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis],
+                              axis=1)
+
+    ones = byte_bits.sum(axis=1).astype(np.int64)
+    nibbles = np.zeros((256, 16), dtype=np.int64)
+    lead = np.zeros(256, dtype=np.int64)
+    trail = np.zeros(256, dtype=np.int64)
+    inner = np.zeros((256, 2, INNER_RUN_LENGTH + 1), dtype=np.int64)
+
+    for value in range(256):
+        nibbles[value, value >> 4] += 1
+        nibbles[value, value & 0x0f] += 1
+
+        bits = byte_bits[value]
+        starts = [0] + [i for i in range(1, 8) if bits[i] != bits[i - 1]]
+        lengths = np.diff(starts + [8])
+
+        lead[value] = lengths[0]
+        if len(lengths) > 1:
+            trail[value] = lengths[-1]
+        for start, length in zip(starts[1:-1], lengths[1:-1]):
+            inner[value, bits[start], length] += 1
+
+    return ones, nibbles, lead, trail, inner.reshape(256, -1)
+
+BYTE_ONES, BYTE_NIBBLES, BYTE_LEAD, BYTE_TRAIL, BYTE_INNER = byte_tables()
+
+def fips_statistics(binary_sequence, poker_width=4):
+    """
+    Calculate the statistics of all four FIPS 140-1 tests in one pass over
+    the packed buffer.
+
+    One histogram of the byte values gives, through the lookup tables, the
+    number of ones, the poker blocks of 4 or 8 bits and all runs inside the
+    bytes. Only the runs that touch the edge of a byte are put together from
+    the leading and trailing runs of the bytes, a run carries over into the
+    next byte if its first bit is the same as the last one.
+
+    Sequences that don't end on a byte boundary and other poker widths fall
+    back to the single statistics.
+
+    """
+    binary_sequence = as_bit_sequence(binary_sequence)
+
+    length = len(binary_sequence)
+    if length == 0 or length % 8 != 0:
+        return _single_statistics(binary_sequence, poker_width)
+
+    packed = binary_sequence.packed
+    counts = np.bincount(packed, minlength=256)
+
+    statistics = dict()
+    statistics["length"] = length
+    statistics["ones"] = int(counts @ BYTE_ONES)
+
+    if poker_width == 4:
+        statistics["poker"] = counts @ BYTE_NIBBLES
+    elif poker_width == 8:
+        statistics["poker"] = counts.astype(np.int64)
+    else:
+        statistics["poker"] = poker.poker_counts(binary_sequence, poker_width)
+
+    # the leading and the trailing run of every byte, a byte that is one run
+    # only has a leading one
+    edges = np.empty(2 * len(packed), dtype=np.int64)
+    edges[0::2] = BYTE_LEAD[packed]
+    edges[1::2] = BYTE_TRAIL[packed]
+
+    edge_values = np.empty(2 * len(packed), dtype=np.uint8)
+    edge_values[0::2] = packed >> 7
+    edge_values[1::2] = packed & 1
+
+    new_run = np.empty(2 * len(packed), dtype=bool)
+    new_run[0] = True
+    new_run[1::2] = edges[1::2] > 0
+    new_run[2::2] = (packed[1:] >> 7) != (packed[:-1] & 1)
+
+    starts = np.flatnonzero(new_run)
+    values = edge_values[starts]
+    lengths = np.add.reduceat(edges, starts)
+
+    # the runs inside the bytes are all enclosed, the edge runs except for the
+    # first and the last one of the sequence
+    inner = (counts @ BYTE_INNER).reshape(2, INNER_RUN_LENGTH + 1)
+
+    histogram = runs.runs_histogram(binary_sequence, (values, lengths))
+    histogram[:, :INNER_RUN_LENGTH + 1] += inner
+    statistics["runs"] = histogram
+
+    longest = list(runs.longest_runs(binary_sequence, (values, lengths)))
+    for value in [0, 1]:
+        inner_lengths = np.flatnonzero(inner[value])
+        if len(inner_lengths) > 0:
+            longest[value] = max(longest[value], int(inner_lengths[-1]))
+    statistics["longest_runs"] = tuple(longest)
+
+    return statistics
+
+def _single_statistics(binary_sequence, poker_width=4):
+    """
+    Statistics of fips_statistics() from the single tests, the run-length
+    encoding is shared by the runs and the long runs test.
+
+    """
+    run_lengths = runs.run_lengths(binary_sequence)
+
+    statistics = dict()
+    statistics["length"] = len(binary_sequence)
+    statistics["ones"] = binary_sequence.count_ones()
+    statistics["poker"] = poker.poker_counts(binary_sequence, poker_width)
+    statistics["runs"] = runs.runs_histogram(binary_sequence, run_lengths)
+    statistics["longest_runs"] = runs.longest_runs(binary_sequence, run_lengths)
+
+    return statistics
+
+def fips_passed(binary_sequence, poker_width=4):
+    """
+    Perform the monobit, poker, runs and long runs test.
+
+    Returns a dictionary with the verdict of every test, with the same keys as
+    run_tests.sequence_test(). The longest runs are added as well.
+
+    """
+    statistics = fips_statistics(binary_sequence, poker_width)
+
+    longest_zero, longest_one = statistics["longest_runs"]
+
+    results = dict()
+    results["monobit"] = monobit.monobit_verdict(
+        statistics["ones"], statistics["length"])
+    results["poker"] = poker.poker_verdict(statistics["poker"], poker_width)
+    results["runs"] = runs.runs_verdict(statistics["runs"])
+    results["long_runs"] = runs.long_runs_verdict(longest_zero, longest_one)
+    results["longest_runs"] = {
+        "zeros": longest_zero,
+        "ones": longest_one,
+    }
+
+    return results
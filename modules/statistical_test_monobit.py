@@ -6,21 +6,35 @@ http://csrc.nist.gov/publications/fips/fips1401.htm
 
 """
 from util.logging.logger import CoreLog as cl
+from modules.bit_sequence import as_bit_sequence
+
+# the number of ones in 20000 bits has to be strictly between these bounds
+LOWER_BOUND = 9654
+UPPER_BOUND = 10346
 
 def monobit_passed(binary_sequence):
     """
     Test the binary sequence for occurences of 0 and 1.
 
-    Binary sequence must be a string.
+    Binary sequence is a BitSequence (or a string of 0 and 1).
 
     """
+    binary_sequence = as_bit_sequence(binary_sequence)
+
     bin_len = len(binary_sequence)
-    bin_sum = sum([int(i) for i in binary_sequence])
+    bin_sum = binary_sequence.count_ones()
+
+    return monobit_verdict(bin_sum, bin_len)
 
+def monobit_verdict(bin_sum, bin_len):
+    """
+    Decide the monobit test from the number of ones in the sequence.
+
+    """
     ratio = bin_sum/bin_len
 
-    lower_bound = 9654/20000
-    upper_bound = 10346/20000
+    lower_bound = LOWER_BOUND/20000
+    upper_bound = UPPER_BOUND/20000
     if (lower_bound < ratio < upper_bound):
         cl.verbose("Monobit test passed, ratio is {:.4f}".format(ratio))
         return True
@@ -6,30 +6,77 @@ http://csrc.nist.gov/publications/fips/fips1401.htm
 
 """
 from util.logging.logger import CoreLog as cl
+from modules.bit_sequence import as_bit_sequence
 
 import numpy as np
 
-def poker_passed(binary_sequence):
+# Bounds of the poker statistic for blocks of m bits. The statistic follows a
+# chi-square distribution with 2**m - 1 degrees of freedom. For m = 4 these are
+# the FIPS 140-1 bounds, the others are the chi-square quantiles for the same
+# tail probabilities (about 3.1e-7 below and 7.0e-7 above).
+POKER_BOUNDS = {
+    4: (1.03, 57.4),
+    5: (6.03, 84.70),
+    6: (21.90, 132.66),
+    7: (62.76, 219.22),
+    8: (157.87, 379.16),
+    9: (367.25, 680.34),
+    10: (813.25, 1256.26),
+    11: (1743.87, 2370.67),
+    12: (3659.79, 4546.55),
+    13: (7568.97, 8823.41),
+    14: (15496.77, 17271.20),
+    15: (31507.12, 34016.93),
+    16: (63746.69, 67296.51),
+}
+
+def poker_counts(binary_sequence, m=4):
+    """
+    Divide the binary sequence into blocks of m bits and count the occurences
+    of each of the 2**m possible blocks.
+
+    """
+    binary_sequence = as_bit_sequence(binary_sequence)
+    k = len(binary_sequence) // m
+    b = binary_sequence.packed
+
+    if m == 4:
+        # the two halves of every byte
+        c = np.column_stack((b >> 4, b & 0x0f)).reshape(-1)[:k]
+    elif m == 8:
+        c = b[:k]
+    elif m == 16:
+        c = b[:2*k].view(">u2")
+    else:
+        bits = binary_sequence.bits()[:k*m].reshape(k, m).astype(np.int64)
+        c = bits @ (1 << np.arange(m - 1, -1, -1))
+
+    return np.bincount(c, minlength=2**m).astype(np.int64)
+
+def poker_passed(binary_sequence, m=4):
     """
     Perform the poker test on the binary sequence.
 
-    Binary sequence must be a string.
+    Binary sequence is a BitSequence (or a string of 0 and 1). m is the block
+    width in bits, FIPS 140-1 uses m = 4.
 
     """
-    b = binary_sequence
+    if m not in POKER_BOUNDS:
+        raise ValueError("Poker test is only defined for block widths "
+                         "from 4 to 16, not {}".format(m))
 
-    # divide the binary sequence into 4 bit sequences and count the occurences
-    # of each of the 16 possible sequences
-    c = list()
-    for j in range(5000):
-        c.append(b[4*j:4*j+4])
+    return poker_verdict(poker_counts(binary_sequence, m), m)
 
-    _, f = np.unique(c, return_counts=True)
+def poker_verdict(f, m=4):
+    """
+    Decide the poker test from the counts of the 2**m possible blocks.
+
+    """
+    k = int(np.sum(f))
 
-    res = 16/5000 * sum(f*f) - 5000
+    res = 2**m/k * int(np.sum(f*f)) - k
 
-    lower_bound = 1.03
-    upper_bound = 57.4
+    lower_bound, upper_bound = POKER_BOUNDS[m]
     if (lower_bound < res < upper_bound):
         cl.verbose("Poker test passed, result is {:.4f}".format(res))
         return True
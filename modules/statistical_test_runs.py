@@ -7,41 +7,85 @@ http://csrc.nist.gov/publications/fips/fips1401.htm
 """
 import numpy as np
 
-import multiprocessing
-from itertools import repeat
-
 from util.logging.logger import CoreLog as cl
+from modules.bit_sequence import as_bit_sequence
 
 
-def runs_instance(binary_sequence, length=1):
+# required intervals for runs of length 1 to 5 and 6 (or more)
+RUNS_INTERVALS = [
+    (1, 2267, 2733),
+    (2, 1079, 1421),
+    (3, 502, 748),
+    (4, 223, 402),
+    (5, 90, 223),
+    (6, 90, 223),
+]
+
+# runs of this length (or longer) fail the long runs test
+LONG_RUN_LENGTH = 34
+
+def run_lengths(binary_sequence):
     """
-    Perform a runs test for a given instance.
+    Run-length encoding of the binary sequence.
+
+    Returns the bit value and the length of every run, in order.
 
     """
-    ones = "0{}0".format("1" * length)
-    zeros = "1{}1".format("0" * length)
+    bits = as_bit_sequence(binary_sequence).bits()
+
+    if len(bits) == 0:
+        return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.int64)
+
+    # a new run starts wherever the bit changes
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bits)) + 1))
+    lengths = np.diff(np.append(starts, len(bits)))
+
+    return bits[starts], lengths
+
+def runs_histogram(binary_sequence, runs=None):
+    """
+    Count the runs of every length.
+
+    Only runs that are enclosed by the other bit value are counted, i.e. not
+    the first and the last run of the sequence. Returns an array where entry
+    [0, n] is the number of runs of n zeros and [1, n] the number of runs of n
+    ones. The array covers at least all lengths below LONG_RUN_LENGTH.
 
-    substrings = list()
-    for i, k in enumerate(binary_sequence):
-        sstring = binary_sequence[i:i+2+length]
-        if len(sstring) == 2+length:
-            substrings.append(sstring)
+    runs is the output of run_lengths() if that is already known.
 
-    string_instance, instance_count = np.unique(
-        substrings, return_counts=True)
+    """
+    if runs is None:
+        runs = run_lengths(binary_sequence)
+    values, lengths = runs
+    values = values[1:-1].astype(np.int64)
+    lengths = lengths[1:-1]
+
+    width = LONG_RUN_LENGTH
+    if len(lengths) > 0:
+        width = max(width, int(lengths.max()) + 1)
+
+    histogram = np.bincount(values * width + lengths, minlength=2 * width)
+
+    return histogram.reshape(2, width)
+
+def runs_instance(binary_sequence, length=1):
+    """
+    Perform a runs test for a given instance.
+
+    Counts the runs of exactly `length` zeros (ones) that are enclosed by ones
+    (zeros).
+
+    """
+    histogram = runs_histogram(binary_sequence)
 
-    zero_count = 0
-    one_count = 0
+    if length >= histogram.shape[1]:
+        return 0, 0
 
-    for it, inst in enumerate(string_instance):
-        if inst == zeros:
-            zero_count = instance_count[it]
-        if inst == ones:
-            one_count = instance_count[it]
+    zero_count, one_count = histogram[:, length]
 
-    return zero_count, one_count
+    return int(zero_count), int(one_count)
 
-def runs_passed(binary_sequence, parallel=4):
+def runs_passed(binary_sequence):
     """
     Perform a runs test.
 
@@ -53,100 +97,40 @@ def runs_passed(binary_sequence, parallel=4):
     5 	            90-223
     6 (or more)     90-223
 
+    All lengths are counted from one run-length encoding of the sequence.
+    Runs of LONG_RUN_LENGTH and more are left to the long runs test.
+
+    """
+    return runs_verdict(runs_histogram(binary_sequence))
+
+def runs_verdict(histogram):
+    """
+    Decide the runs test from the histogram of the run lengths.
+
     """
     test_passed = True
 
-    zc1, oc1 = runs_instance(binary_sequence, 1)
-    pass1 = True
-    for count in [zc1, oc1]:
-        if not (2267 <= count) and not (count <= 2733):
-            pass1 = False
-            test_passed = False
-    if pass1:
-        cl.verbose("Runs test: {} 0 runs and {} 1 runs of length {}".format(
-            zc1, oc1, 1))
-    else:
-        cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length {} "
-                           "(not in [2267, 2733])".format(zc1, oc1, 1))
-
-
-    zc2, oc2 = runs_instance(binary_sequence, 2)
-    pass2 = True
-    for count in [zc2, oc2]:
-        if not (1079 <= count) or not (count <= 1421):
-            pass2 = False
-            test_passed = False
-    if pass2:
-        cl.verbose("Runs test: {} 0 runs and {} 1 runs of length {}".format(
-            zc2, oc2, 2))
-    else:
-        cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length {} "
-                           "(not in [1079, 1421])".format(zc2, oc2, 2))
-
-    zc3, oc3 = runs_instance(binary_sequence, 3)
-    pass3 = True
-    for count in [zc3, oc3]:
-        if not (502 <= count) or not (count <= 748):
-            pass3 = False
-            test_passed = False
-    if pass3:
-        cl.verbose("Runs test: {} 0 runs and {} 1 runs of length {}".format(
-            zc3, oc3, 3))
-    else:
-        cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length {} "
-                           "(not in [502, 748])".format(zc3, oc3, 3))
-
-    zc4, oc4 = runs_instance(binary_sequence, 4)
-    pass4 = True
-    for count in [zc4, oc4]:
-        if not (223 <= count) or not (count <= 402):
-            pass4 = False
-            test_passed = False
-    if pass4:
-        cl.verbose("Runs test: {} 0 runs and {} 1 runs of length {}".format(
-            zc4, oc4, 4))
-    else:
-        cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length {} "
-                           "(not in [223, 402])".format(zc4, oc4, 4))
-
-    zc5, oc5 = runs_instance(binary_sequence, 5)
-    pass5 = True
-    for count in [zc5, oc5]:
-        if not (90 <= count) or not (count <= 223):
-            pass5 = False
-            test_passed = False
-    if pass5:
-        cl.verbose("Runs test: {} 0 runs and {} 1 runs of length {}".format(
-            zc5, oc5, 5))
-    else:
-        cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length {} "
-                           "(not in [90, 223])".format(zc5, oc5, 5))
-
-    zc6p = 0
-    oc6p = 0
-
-    lengths = range(6, 34)
-    with multiprocessing.Pool(parallel) as p:
-        try:
-            res = p.starmap(runs_instance, zip(repeat(binary_sequence), lengths))
-        except KeyboardInterrupt:
-            pass                # QUIET!
-
-    for r in res:
-        zc6p += r[0]
-        oc6p += r[1]
-
-    pass6 = True
-    for count in [zc6p, oc6p]:
-        if not (90 <= count) or not (count <= 223):
-            pass6 = False
-            test_passed = False
-    if pass6:
-        cl.verbose("Runs test: {} 0 runs and {} 1 runs of length {}".format(
-            zc6p, oc6p, "6+"))
-    else:
-        cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length {} "
-                           "(not in [90, 223])".format(zc6p, oc6p, "6+"))
+    for length, lower, upper in RUNS_INTERVALS:
+
+        if length == 6:
+            zc, oc = histogram[:, 6:LONG_RUN_LENGTH].sum(axis=1)
+            label = "6+"
+        else:
+            zc, oc = histogram[:, length]
+            label = length
+
+        passed = True
+        for count in [zc, oc]:
+            if not (lower <= count) or not (count <= upper):
+                passed = False
+                test_passed = False
+        if passed:
+            cl.verbose("Runs test: {} 0 runs and {} 1 runs of length "
+                       "{}".format(zc, oc, label))
+        else:
+            cl.verbose_warning("Runs test: {} 0 runs and {} 1 runs of length "
+                               "{} (not in [{}, {}])".format(
+                                   zc, oc, label, lower, upper))
 
     if test_passed:
         cl.verbose("Runs test passed, all within tolerance")
@@ -155,6 +139,23 @@ def runs_passed(binary_sequence, parallel=4):
 
     return test_passed
 
+def longest_runs(binary_sequence, runs=None):
+    """
+    Length of the longest run of zeros and of the longest run of ones.
+
+    Unlike the runs test this includes the first and the last run. runs is
+    the output of run_lengths() if that is already known.
+
+    """
+    if runs is None:
+        runs = run_lengths(binary_sequence)
+    values, lengths = runs
+
+    longest_zero = int(lengths[values == 0].max(initial=0))
+    longest_one = int(lengths[values == 1].max(initial=0))
+
+    return longest_zero, longest_one
+
 def long_runs_instance(binary_sequence, length):
     """
     One instance (length) of the long runs test.
@@ -162,39 +163,39 @@ def long_runs_instance(binary_sequence, length):
     """
     test_passed = True
 
-    zeros = "0"*length
-    if zeros in binary_sequence:
+    longest_zero, longest_one = longest_runs(binary_sequence)
+
+    if longest_zero >= length:
         cl.debug("length {} of 0 in binary_sequence".format(length))
         test_passed = False
 
-    ones = "1"*length
-    if ones in binary_sequence:
+    if longest_one >= length:
         cl.debug("length {} of 1 in binary_sequence".format(length))
         test_passed = False
 
     return test_passed
 
-def long_runs_passed(binary_sequence, parallel=4):
+def long_runs_passed(binary_sequence):
     """
     Perform a runs test with length 34 or more.
 
+    Only the longest runs have to be checked for that.
+
     """
-    test_passed = True
+    return long_runs_verdict(*longest_runs(binary_sequence))
 
-    lengths = range(34, len(binary_sequence))
-    with multiprocessing.Pool(parallel) as p:
-        try:
-            res = p.starmap(long_runs_instance, zip(repeat(binary_sequence), lengths))
-        except KeyboardInterrupt:
-            pass                # QUIET!
+def long_runs_verdict(longest_zero, longest_one):
+    """
+    Decide the long runs test from the longest runs of zeros and ones.
 
-    for r in res:
-        if r is False:
-            test_passed = False
+    """
+    test_passed = max(longest_zero, longest_one) < LONG_RUN_LENGTH
 
     if test_passed:
-        cl.verbose("Long runs test passed, no long runs")
+        cl.verbose("Long runs test passed, no long runs (longest runs are {} "
+                   "zeros and {} ones)".format(longest_zero, longest_one))
     else:
-        cl.verbose_warning("Long runs test failed")
+        cl.verbose_warning("Long runs test failed (longest runs are {} zeros "
+                           "and {} ones)".format(longest_zero, longest_one))
 
     return test_passed
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unittests for the batched statistical tests.
+
+"""
+import unittest
+
+try:
+    import modules.batch_tests as batch_tests
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.batch_tests as batch_tests
+
+from util.logging.logger import CoreLog as cl
+
+import modules.gen_parameters_and_numbers as gpn
+import modules.statistical_test_fips as fips
+import modules.statistical_test_autocorrelation as ac
+
+class Test_BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def compare(self, parameter_list, poker_width=4):
+        """
+        Compare the batch results with the single tests.
+
+        """
+        batch_res = batch_tests.batch_results(parameter_list, poker_width)
+
+        for parameters, res in zip(parameter_list, batch_res):
+            nums = gpn.gen_nums(parameters)
+            binary_sequence = gpn.gen_bit_sequence(nums,
+                                                   modulus=parameters["m"])
+
+            expected = fips.fips_passed(binary_sequence, poker_width)
+            expected["autocorrelation"] = ac.autocorrelation_passed(
+                binary_sequence)
+
+            self.assertEqual(res, expected)
+
+    def test_batch_same_as_single(self):
+        """batch results equal the results of the single tests
+
+        """
+        # small modulus, many short periods and failures
+        parameter_list = [
+            {"x0": 1, "a": a, "c": c, "m": 2**11 + 5}
+            for a in range(1, 12) for c in range(0, 3)
+        ]
+        self.compare(parameter_list)
+
+        # power of two
+        parameter_list = [
+            {"x0": 1, "a": a, "c": 12345, "m": 2**31}
+            for a in [65539, 1103515245, 1103515246, 69069]
+        ]
+        self.compare(parameter_list)
+
+        # modulus above 32 bits
+        parameter_list = [
+            {"x0": 3, "a": a, "c": 1, "m": 10**10}
+            for a in [3141592621, 3141592622]
+        ]
+        self.compare(parameter_list, poker_width=6)
+
+    def test_batch_sequences(self):
+        """batch sequences equal the single sequences
+
+        """
+        parameter_list = [
+            {"x0": x0, "a": 7**5, "c": c, "m": 2**31 - 1}
+            for x0 in [1, 2] for c in [0, 5]
+        ]
+
+        bits = batch_tests.batch_sequences(parameter_list)
+
+        for row, parameters in zip(bits, parameter_list):
+            nums = gpn.gen_nums(parameters)
+            binary_sequence = gpn.gen_bit_sequence(nums,
+                                                   modulus=parameters["m"])
+            self.assertEqual(row.tolist(), binary_sequence.bits().tolist())
+
+        with self.assertRaises(ValueError):
+            batch_tests.batch_sequences([
+                {"x0": 1, "a": 3, "c": 1, "m": 2**12},
+                {"x0": 1, "a": 3, "c": 1, "m": 2**13},
+            ])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unittests for the bit sequence container.
+
+"""
+import unittest
+
+try:
+    import modules.bit_sequence as bs
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.bit_sequence as bs
+
+from util.logging.logger import CoreLog as cl
+
+import numpy as np
+
+class Test_BitSequence(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def test_string_roundtrip(self):
+        """string to bit sequence and back
+
+        """
+        string = "0011010111100000101"
+        seq = bs.BitSequence.from_string(string)
+
+        self.assertEqual(len(seq), len(string))
+        self.assertEqual(str(seq), string)
+        self.assertEqual(seq, string)
+        self.assertEqual(seq.packed.nbytes, 3)
+        self.assertEqual(seq.bits().tolist(), [int(i) for i in string])
+
+        with self.assertRaises(ValueError):
+            bs.BitSequence.from_string("0120")
+
+    def test_count_ones(self):
+        """count the set bits, also in a partial last byte
+
+        """
+        string = "1101111101"
+        seq = bs.BitSequence.from_string(string)
+        self.assertEqual(seq.count_ones(), 8)
+
+        # undefined trailing bits in a view must not be counted
+        self.assertEqual(seq[0:3].count_ones(), 2)
+
+    def test_slices(self):
+        """slicing and indexing
+
+        """
+        string = "10110011100011110000111110000011"
+        seq = bs.BitSequence.from_string(string)
+
+        self.assertEqual(seq[3], 1)
+        self.assertEqual(seq[-1], 1)
+        self.assertEqual(seq[4], 0)
+
+        aligned = seq[8:20]
+        self.assertEqual(str(aligned), string[8:20])
+        self.assertTrue(np.shares_memory(aligned.packed, seq.packed))
+
+        unaligned = seq[3:17]
+        self.assertEqual(str(unaligned), string[3:17])
+
+        self.assertEqual(str(seq[::3]), string[::3])
+
+    def test_words(self):
+        """view the sequence as 64 bit words
+
+        """
+        string = "01" * 64 + "111"
+        seq = bs.BitSequence.from_string(string)
+
+        words = seq.words
+        self.assertEqual(len(words), 2)
+        self.assertEqual(int(words[0]), int("01" * 32, 2))
+        self.assertTrue(np.shares_memory(words, seq.packed))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
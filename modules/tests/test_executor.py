@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unittests for the sweep executor.
+
+"""
+import unittest
+
+try:
+    from modules.executor import SweepExecutor
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    from modules.executor import SweepExecutor
+
+from util.logging.logger import CoreLog as cl
+
+import modules.gen_parameters_and_numbers as gpn
+import modules.statistical_test_monobit as monobit
+import modules.special_test_spectral as st
+
+class Test_SweepExecutor(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def test_inline(self):
+        """one process runs the work right away
+
+        """
+        executor = SweepExecutor(1)
+
+        result = executor.submit(pow, 3, 4, 7)
+
+        self.assertEqual(result.get(), pow(3, 4, 7))
+        self.assertEqual(executor.task_count, 1)
+        self.assertEqual(executor.startup_time, 0.0)
+
+        executor.close()
+
+    def test_pool(self):
+        """results from the worker pool are the same as from this process
+
+        """
+        parameters = {"x0": 1, "a": 1103515245, "c": 12345, "m": 2**31 - 1}
+        nums = gpn.gen_nums(parameters)
+        binary_sequence = gpn.gen_bit_sequence(nums, modulus=parameters["m"])
+
+        with SweepExecutor(2) as executor:
+            monobit_result = executor.submit(monobit.monobit_passed,
+                                             binary_sequence)
+            spectral_result = executor.submit(st.spectral_test, parameters, 5)
+
+            self.assertEqual(monobit_result.get(),
+                             monobit.monobit_passed(binary_sequence))
+            self.assertEqual(spectral_result.get(),
+                             st.spectral_test(parameters, 5))
+
+            self.assertEqual(executor.task_count, 2)
+            self.assertGreater(executor.startup_time, 0.0)
+            self.assertGreater(executor.compute_time, 0.0)
+
+        self.assertIn("overhead", executor.report())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
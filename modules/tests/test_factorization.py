@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Unittests for the factorization service.
+
+"""
+import unittest
+import math
+import pathlib
+import tempfile
+
+try:
+    from modules.factorization import FactorizationService
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    from modules.factorization import FactorizationService
+
+from util.logging.logger import CoreLog as cl
+
+import modules.factorization as fz
+from modules.results_store import ResultsStore
+
+def trial_division(n):
+    """
+    Factorization by trial division, to compare with.
+
+    """
+    factors = list()
+    p = 2
+    while p * p <= n:
+        e = 0
+        while n % p == 0:
+            n //= p
+            e += 1
+        if e:
+            factors.append((p, e))
+        p += 1
+    if n > 1:
+        factors.append((n, 1))
+
+    return tuple(factors)
+
+class Test_FactorizationService(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp_dir.name) / "factorizations.sqlite"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_small(self):
+        """same factorizations as from trial division
+
+        """
+        service = FactorizationService()
+        for n in range(1, 3000):
+            self.assertEqual(service.factorize(n), trial_division(n))
+
+    def test_sieve(self):
+        """the sieve gives the same factorizations, also across segments
+
+        """
+        lo = 10**10 - 100
+        hi = lo + fz.SIEVE_SEGMENT + 100
+        service = FactorizationService(lo, hi)
+        plain = FactorizationService()
+
+        for n in list(range(lo, lo + 300)) + list(range(hi - 300, hi + 1)):
+            self.assertEqual(service.factorize(n), plain.factorize(n))
+
+        for lo, hi in [(1, 1000), (2, 3), (900, 5000)]:
+            service = FactorizationService(lo, hi)
+            for n in range(lo, hi + 1):
+                self.assertEqual(service.factorize(n), trial_division(n))
+
+        # 0 is divisible by every prime, a window can't start there
+        for lo in [0, -5]:
+            with self.assertRaises(ValueError):
+                FactorizationService(lo, 100)
+
+    def test_big(self):
+        """Pollard's rho for single big numbers
+
+        """
+        service = FactorizationService()
+
+        cases = {
+            2**31 - 1: ((2**31 - 1, 1),),
+            2**64 + 1: ((274177, 1), (67280421310721, 1)),
+            (2**31 - 1) * (2**61 - 1): ((2**31 - 1, 1), (2**61 - 1, 1)),
+            2**64: ((2, 64),),
+        }
+        for n, factors in cases.items():
+            self.assertEqual(service.factorize(n), factors)
+
+        for n in [2**64 - 1, 10**18 + 9, 999999000001 * 1000003]:
+            factors = service.factorize(n)
+            self.assertEqual(math.prod(p**e for p, e in factors), n)
+            for p, _ in factors:
+                self.assertTrue(fz.is_probable_prime(p))
+
+    def test_disk(self):
+        """the factorizations are still known after reopening
+
+        """
+        with FactorizationService(path=self.path) as service:
+            factors = service.factorize(2**64 + 1)
+
+        with ResultsStore(self.path) as store:
+            self.assertEqual(store.get((2**64 + 1,)), factors)
+
+        with FactorizationService(path=self.path) as service:
+            self.assertEqual(service.factorize(2**64 + 1), factors)
+
+    def test_bounded(self):
+        """only MEMORY_SIZE factorizations stay in memory, the new ones are
+        written to disk in groups of FLUSH_SIZE
+
+        """
+        hi = fz.MEMORY_SIZE + fz.FLUSH_SIZE
+
+        with FactorizationService(1, hi, self.path) as service:
+            for n in range(1, hi + 1):
+                service.factorize(n)
+
+            self.assertEqual(len(service._memory), fz.MEMORY_SIZE)
+
+            with ResultsStore(self.path) as store:
+                self.assertEqual(len(store), hi)
+
+            # dropped from memory, but still known from disk
+            self.assertEqual(service.factorize(2**11 * 3), ((2, 11), (3, 1)))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
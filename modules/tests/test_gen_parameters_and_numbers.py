@@ -15,6 +15,8 @@ except ImportError:
 
 from util.logging.logger import CoreLog as cl
 
+import numpy as np
+
 
 class Test_GenParametersAndNumbers(unittest.TestCase):
 
@@ -73,6 +75,35 @@ class Test_GenParametersAndNumbers(unittest.TestCase):
         binary_sequence = gpn.gen_binary_sequence(binary_nums)
         self.assertEqual(len(binary_sequence), 20000)
 
+    def test_gen_bit_sequence(self):
+        """expand numbers into bits without strings, same bits as the strings
+
+        """
+        rng = np.random.default_rng(0)
+
+        for modulus in [2, 5, 16, 251, 2**11, 2**31 - 1, 10**10, 2**64]:
+            nums = rng.integers(0, modulus, size=3000, dtype=np.uint64,
+                                endpoint=False)
+            expected = gpn.gen_binary_sequence(
+                gpn.gen_binary_nums(nums.tolist(), modulus=modulus))
+
+            binary_sequence = gpn.gen_bit_sequence(nums, modulus=modulus)
+            self.assertEqual(str(binary_sequence), expected)
+
+        # without modulus the numbers are not padded
+        nums = [0, 1, 2, 15, 7, 2**63 + 5, 3]
+        expected = gpn.gen_binary_sequence(gpn.gen_binary_nums(nums))
+        binary_sequence = gpn.gen_bit_sequence(
+            np.asarray(nums, dtype=np.uint64))
+        self.assertEqual(str(binary_sequence), expected)
+
+        # numbers beyond 64 bits
+        nums = [2**70 + 1, 5, 2**65]
+        binary_sequence = gpn.gen_bit_sequence(nums, modulus=2**71)
+        expected = gpn.gen_binary_sequence(
+            gpn.gen_binary_nums(nums, modulus=2**71))
+        self.assertEqual(str(binary_sequence), expected)
+
     def test_gen_expected_statistic(self):
         """generate a expected statistic
 
@@ -85,6 +116,32 @@ class Test_GenParametersAndNumbers(unittest.TestCase):
         res = gpn.gen_expected_statistic(modulus)
         self.assertEqual(res, 2.0)
 
+    def test_parameter_sweep(self):
+        """lazy parameter sweep and its number of parameter sets
+
+        """
+        sweep = gpn.parameter_sweep(1, 3, 9, 0, 4, 2, 12)
+
+        expected = list()
+        for m in range(2, 13):
+            for c in range(0, 5):
+                for a in range(3, 10):
+                    if a < m and c < m:
+                        expected.append((1, a, c, m))
+
+        self.assertEqual(list(sweep), expected)
+        self.assertEqual(sweep.count(), len(expected))
+
+        self.assertEqual(gpn.parameter_dict(expected[0]),
+                         {"x0": 1, "a": 3, "c": 0, "m": 4})
+
+        # huge sweeps are counted without generating them, up to m = 2**20
+        # a runs from 1 to m - 1, then from 1 to 2**20
+        sweep = gpn.parameter_sweep(1, 1, 2**20, 0, 2**10, 2**11, 2**40)
+        a_count = (sum(range(2**11 - 1, 2**20))
+                   + (2**40 - 2**20) * 2**20)
+        self.assertEqual(sweep.count(), a_count * (2**10 + 1))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
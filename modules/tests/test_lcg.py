@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unittests for the linear congruential generator.
+
+"""
+import unittest
+
+try:
+    import modules.lcg as lcg
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.lcg as lcg
+
+from util.logging.logger import CoreLog as cl
+
+
+def scalar_nums(x0, a, c, m, length):
+    """
+    Reference numbers from the scalar LCG.
+
+    """
+    res = list()
+    for _ in range(length):
+        x0 = lcg.lcg(x0, a, c, m)
+        res.append(x0)
+    return res
+
+
+class Test_LCG(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def test_block_matches_scalar(self):
+        """block generator returns the same numbers as the scalar LCG
+
+        """
+        parameters = [
+            (1, 33, 0, 251),
+            (1, 1103515245, 12345, 2**31),
+            (1, 1103515245, 453816694, 2**31 - 1),
+            (1, 1103515245, 453816694, 2**32 - 1),
+            (0, 3141592621, 1, 10**10),
+            (1, 6364136223846793005, 1442695040888963407, 2**64),
+            (7, 2862933555777941757, 3037000493, 2**64 - 59),
+            (3, 2**40 + 15, 2**62 + 1, 2**63 + 29),
+        ]
+
+        for x0, a, c, m in parameters:
+            expected = scalar_nums(x0, a, c, m, 2000)
+            nums = lcg.lcg_block(x0, a, c, m, 2000)
+            self.assertEqual(nums.tolist(), expected)
+
+    def test_block_lanes(self):
+        """block generator output does not depend on the number of lanes
+
+        """
+        x0, a, c, m = 1, 7**5, 0, 2**31 - 1
+        expected = scalar_nums(x0, a, c, m, 1001)
+
+        for lanes in [1, 2, 7, 64, 1001, 5000]:
+            nums = lcg.lcg_block(x0, a, c, m, 1001, lanes=lanes)
+            self.assertEqual(nums.tolist(), expected)
+
+    def test_block_too_big(self):
+        """block generator refuses moduli above 64 bits
+
+        """
+        with self.assertRaises(ValueError):
+            lcg.lcg_block(1, 3, 1, 2**64 + 1, 10)
+
+    def test_jump(self):
+        """jumping n steps ahead equals n single steps
+
+        """
+        x0, a, c, m = 1, 1103515245, 12345, 2**31
+        nums = scalar_nums(x0, a, c, m, 1000)
+
+        for n in [1, 2, 3, 17, 64, 999, 1000]:
+            self.assertEqual(lcg.lcg_skip(x0, a, c, m, n), nums[n-1])
+
+        self.assertEqual(lcg.lcg_skip(x0, a, c, m, 0), x0)
+        self.assertEqual(lcg.lcg_jump(a, c, m, 1), (a, c))
+
+    def test_jump_far(self):
+        """jumps are additive, also far into the sequence
+
+        """
+        x0, a, c, m = 1, 6364136223846793005, 1442695040888963407, 2**64
+        n1 = 10**9
+        n2 = 10**18 + 3
+
+        x1 = lcg.lcg_skip(x0, a, c, m, n1)
+        x12 = lcg.lcg_skip(x1, a, c, m, n2)
+        self.assertEqual(x12, lcg.lcg_skip(x0, a, c, m, n1 + n2))
+
+    def test_split(self):
+        """substreams continue where the previous one stopped
+
+        """
+        x0, a, c, m = 3, 7**5, 0, 2**31 - 1
+        k = 5
+        stride = 300
+        nums = lcg.lcg_block(x0, a, c, m, k*stride).tolist()
+
+        states = lcg.split(x0, a, c, m, k, stride)
+        self.assertEqual(len(states), k)
+
+        for i, state in enumerate(states):
+            substream = lcg.lcg_block(state, a, c, m, stride).tolist()
+            self.assertEqual(substream, nums[i*stride:(i+1)*stride])
+
+        for k in [0, -1]:
+            with self.assertRaises(ValueError):
+                lcg.split(x0, a, c, m, k, stride)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unittests for the number theory of the LCG.
+
+"""
+import unittest
+import math
+
+try:
+    import modules.number_theory as nt
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.number_theory as nt
+
+from util.logging.logger import CoreLog as cl
+
+def brute_force_period(x0, a, c, m):
+    """
+    Period and length of the tail before it, by stepping the LCG.
+
+    """
+    seen = dict()
+    x = x0 % m
+    while x not in seen:
+        seen[x] = len(seen)
+        x = (a * x + c) % m
+
+    return len(seen) - seen[x], seen[x]
+
+class Test_NumberTheory(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def test_multiplicative_order(self):
+        """same order as from stepping through the powers
+
+        """
+        for m in range(1, 200):
+            for a in range(m):
+                if math.gcd(a, m) != 1:
+                    continue
+
+                order = 1
+                while pow(a, order, m) != 1 % m:
+                    order += 1
+                self.assertEqual(nt.multiplicative_order(a, m), order)
+
+    def test_period(self):
+        """the period agrees with stepping the LCG
+
+        """
+        for m in range(1, 40):
+            for a in range(m):
+                for c in range(m):
+                    for x0 in [0, 1, 2, m - 1, m + 5]:
+                        self.assertEqual(nt.period(x0, a, c, m),
+                                         brute_force_period(x0, a, c, m)[0])
+
+                    if c != 0:
+                        self.assertEqual(
+                            nt.hull_dobell(a, c, m),
+                            brute_force_period(1, a, c, m) == (m, 0))
+
+    def test_period_big(self):
+        """prime powers, moduli with many factors and the example from lcong
+
+        """
+        cases = [
+            (1, 33, 0, 251),
+            (5, 3**7 + 1, 3, 3**9),
+            (7, 2**10 + 1, 0, 2**16),
+            (3, 1025, 6, 2**4 * 3**3 * 5**2 * 7),
+            (12345, 69069, 1, 2**17),
+        ]
+        for x0, a, c, m in cases:
+            self.assertEqual(nt.period(x0, a, c, m),
+                             brute_force_period(x0, a, c, m)[0])
+
+        # Hull-Dobell
+        self.assertEqual(nt.period(1, 6364136223846793005, 1, 2**64), 2**64)
+
+        # the order of 16807 mod 2**31 - 1 (a primitive root)
+        self.assertEqual(nt.period(1, 16807, 0, 2**31 - 1), 2**31 - 2)
+
+    def test_brent_period(self):
+        """cycle detection finds the same periods, or gives up
+
+        """
+        for x0, a, c, m in [(1, 33, 0, 251), (2, 6, 1, 2**11),
+                            (3, 69069, 1, 2**15)]:
+            self.assertEqual(nt.brent_period(x0, a, c, m),
+                             brute_force_period(x0, a, c, m)[0])
+
+        # too long, 1 + 2**35 has order 2**35 mod 2**70
+        self.assertIsNone(nt.brent_period(1, 2**35 + 1, 0, 2**70))
+        self.assertIsNone(nt.period(1, 2**35 + 1, 0, 2**70))
+
+        # a short cycle beyond PERIOD_MAX_MODULUS
+        self.assertEqual(nt.period(1, 2**69 + 1, 0, 2**70), 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
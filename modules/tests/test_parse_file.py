@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unittests for parsing random numbers from files.
+
+"""
+import unittest
+import pathlib
+import tempfile
+
+import numpy as np
+
+try:
+    import modules.parse_file as parse_file
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.parse_file as parse_file
+
+from util.logging.logger import CoreLog as cl
+
+from modules.bit_sequence import BitSequence
+
+class Test_ParseFile(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp_dir.name) / "bits"
+
+        rng = np.random.default_rng(24)
+        self.bits = "".join(map(str, rng.integers(0, 2, size=50000)))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, text):
+        self.path.write_bytes(text.encode("ascii"))
+        return str(self.path)
+
+    def test_whitespace(self):
+        """whitespace of any kind is dropped
+
+        """
+        groups = [self.bits[i:i+8] for i in range(0, len(self.bits), 8)]
+        for separator in ["", " ", "\n", " \r\n", "\t"]:
+            file_name = self.write(separator.join(groups) + "\n")
+
+            self.assertEqual(parse_file.parse_from_file(file_name),
+                             BitSequence.from_string(self.bits[:20000]))
+
+            for chunk_size in [7, 4096]:
+                bits = np.concatenate(list(parse_file.iter_bits(
+                    file_name, chunk_size)))
+                self.assertEqual(BitSequence.from_bits(bits),
+                                 BitSequence.from_string(self.bits))
+
+    def test_short(self):
+        """a file with fewer bits gives all of them, an empty one none
+
+        """
+        file_name = self.write(self.bits[:100] + "\n")
+        self.assertEqual(parse_file.parse_from_file(file_name),
+                         BitSequence.from_string(self.bits[:100]))
+
+        file_name = self.write("")
+        self.assertEqual(len(parse_file.parse_from_file(file_name)), 0)
+        self.assertEqual(list(parse_file.iter_blocks(file_name)), [])
+
+    def test_invalid(self):
+        """other characters are an error
+
+        """
+        for text in ["0101 0120", "0101\n01x1", "1,0"]:
+            file_name = self.write(text)
+            with self.assertRaises(ValueError):
+                parse_file.parse_from_file(file_name)
+
+    def test_blocks(self):
+        """consecutive and overlapping blocks, also across chunks
+
+        """
+        file_name = self.write(" ".join(self.bits))
+
+        for step in [None, 20000, 5000, 30000]:
+            for chunk_size in [999, parse_file.READ_CHUNK]:
+                blocks = list(parse_file.iter_blocks(file_name, step=step,
+                                                     chunk_size=chunk_size))
+                starts = range(0, len(self.bits) - 20000 + 1, step or 20000)
+
+                self.assertEqual(len(blocks), len(starts))
+                for block, start in zip(blocks, starts):
+                    self.assertEqual(block, BitSequence.from_string(
+                        self.bits[start:start+20000]))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unittests for the results store.
+
+"""
+import unittest
+import pathlib
+import pickle
+import tempfile
+
+try:
+    from modules.results_store import ResultsStore
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    from modules.results_store import ResultsStore
+
+from util.logging.logger import CoreLog as cl
+
+class Test_ResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp_dir.name) / "results.sqlite"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_put_get(self):
+        """store and read back single results
+
+        """
+        key = (1, 65539, 0, 2**64 + 13)
+        value = {"monobit": True, "longest_runs": {"zeros": 12, "ones": 14}}
+
+        with ResultsStore(self.path) as store:
+            self.assertNotIn(key, store)
+            self.assertIsNone(store.get(key))
+
+            store.put(key, value)
+
+            self.assertIn(key, store)
+            self.assertEqual(len(store), 1)
+            self.assertEqual(store.get(key), value)
+
+            # overwriting replaces the result
+            store.put(key, {"monobit": False})
+            self.assertEqual(len(store), 1)
+            self.assertEqual(store.get(key), {"monobit": False})
+
+    def test_reopen(self):
+        """results survive closing the store
+
+        """
+        items = [((1, a, 0, 31), {"a": a}) for a in range(1, 31)]
+
+        with ResultsStore(self.path) as store:
+            store.put_many(items)
+
+        with ResultsStore(self.path) as store:
+            self.assertEqual(len(store), 30)
+            for key, value in items:
+                self.assertIn(key, store)
+                self.assertEqual(store.get(key), value)
+
+    def test_to_nested_dict(self):
+        """nested dictionary in the layout of the old results files
+
+        """
+        with ResultsStore(self.path) as store:
+            store.put_many([
+                ((1, 3, 0, 31), "x"),
+                ((1, 3, 1, 31), "y"),
+                ((1, 5, 0, 32), "z"),
+            ])
+            res_dict = store.to_nested_dict()
+
+        self.assertEqual(res_dict, {
+            1: {
+                3: {0: {31: "x"}, 1: {31: "y"}},
+                5: {0: {32: "z"}},
+            },
+        })
+
+    def test_import_pickle(self):
+        """import a pickled results file
+
+        """
+        res_dict = {1: {3: {0: {31: "x", 32: "y"}}, 5: {0: {31: "z"}}}}
+
+        pickle_file = pathlib.Path(self.tmp_dir.name) / "results.pickle"
+        with open(str(pickle_file), "wb") as output_file:
+            pickle.dump(res_dict, output_file)
+
+        with ResultsStore(self.path) as store:
+            self.assertEqual(store.import_pickle(pickle_file), 3)
+            self.assertEqual(store.to_nested_dict(), res_dict)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Unittests for running the tests of a sequence.
+
+"""
+import unittest
+import argparse
+import pathlib
+import tempfile
+
+import numpy as np
+
+try:
+    import modules.run_tests as run_tests
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.run_tests as run_tests
+
+from util.logging.logger import CoreLog as cl
+
+import modules.gen_parameters_and_numbers as gpn
+import modules.number_theory as nt
+
+from modules.executor import SweepExecutor
+from modules.results_store import ResultsStore
+from modules.spectral_cache import SpectralCache
+
+import modules.special_test_spectral as st
+
+class Test_FailFast(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.args = argparse.Namespace(
+            poker_width=4, plot_ac=False, spectral_engine="knuth",
+            spectral_dimensions=5, spectral_budget=None)
+
+    def tearDown(self):
+        pass
+
+    def sequence(self, parameters):
+        nums = gpn.gen_nums(parameters)
+        return gpn.gen_bit_sequence(nums, modulus=parameters["m"])
+
+    def test_passed(self):
+        """all tests run and have the same results as without fail-fast
+
+        """
+        parameters = {"x0": 1, "a": 1103515245, "c": 12345, "m": 2**31 - 1}
+        binary_sequence = self.sequence(parameters)
+
+        res = run_tests.fail_fast_sequence_test(self.args, binary_sequence,
+                                                parameters=parameters,
+                                                period=2**31 - 2)
+
+        self.assertEqual(res, run_tests.sequence_test(self.args,
+                                                      binary_sequence,
+                                                      parameters=parameters,
+                                                      period=2**31 - 2))
+        self.assertEqual(res["period"], 2**31 - 2)
+
+    def test_failed(self):
+        """the tests after the first failed one are not run
+
+        """
+        # the sequence is stuck at zero
+        parameters = {"x0": 1, "a": 2, "c": 0, "m": 2**11}
+        binary_sequence = self.sequence(parameters)
+
+        res = run_tests.fail_fast_sequence_test(self.args, binary_sequence,
+                                                parameters=parameters)
+
+        self.assertFalse(res["monobit"])
+        for test in ["poker", "runs", "long_runs", "autocorrelation",
+                     "longest_runs", "spectral"]:
+            self.assertEqual(res[test], run_tests.NOT_RUN)
+
+        # the statistical tests pass, the spectral test fails
+        parameters = {"x0": 1, "a": 33, "c": 0, "m": 251}
+        binary_sequence = self.sequence(parameters)
+
+        res = run_tests.fail_fast_sequence_test(self.args, binary_sequence,
+                                                parameters=parameters)
+        full = run_tests.sequence_test(self.args, binary_sequence,
+                                       parameters=parameters)
+
+        for test in ["monobit", "poker", "runs", "long_runs", "spectral"]:
+            self.assertEqual(res[test], full[test])
+        self.assertEqual(res["autocorrelation"], run_tests.NOT_RUN)
+
+    def test_file(self):
+        """without parameters there is no spectral test
+
+        """
+        parameters = {"x0": 1, "a": 1103515245, "c": 12345, "m": 2**31 - 1}
+        binary_sequence = self.sequence(parameters)
+
+        res = run_tests.fail_fast_sequence_test(self.args, binary_sequence)
+
+        self.assertNotIn("spectral", res)
+        for test in run_tests.STATISTICAL_TESTS:
+            self.assertTrue(res[test])
+
+class Test_Batch(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.args = argparse.Namespace(
+            poker_width=4, plot_ac=False, plot_spectral=False, print=None,
+            fused=False, fail_fast=False, spectral_screen=False,
+            spectral_engine="knuth", spectral_dimensions=5,
+            spectral_budget=None)
+
+    def tearDown(self):
+        pass
+
+    def test_big_modulus(self):
+        """moduli beyond 64 bits are tested one parameter set at a time
+
+        """
+        m = 2**70 + 1
+        batch = list()
+        for i, a in enumerate([3, 5, 2**35 + 1], 1):
+            parameters = {"x0": 1, "a": a, "c": 0, "m": m}
+            batch.append((i, parameters,
+                          run_tests.sequence_period(parameters)))
+
+        items = run_tests.test_batch(self.args, batch, len(batch))
+
+        for (calc_count, parameters, period), (key, res) in zip(batch, items):
+            self.assertEqual(key, run_tests.result_key(parameters))
+            self.assertEqual(res, run_tests.test_parameters(
+                self.args, parameters, run_tests.sequence_test,
+                period=period))
+
+class Test_Parallel(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp_dir.name)
+
+        self.args = argparse.Namespace(
+            poker_width=4, plot_ac=False, plot_spectral=False, print=None,
+            fused=False, fail_fast=False, batch=None, spectral_screen=False,
+            spectral_engine="knuth", spectral_dimensions=5,
+            spectral_budget=None, chunk=3, force=False, prefilter=True)
+
+        # the even multipliers have a too short period for the prefilter
+        self.sweep = gpn.parameter_sweep(1, 1, 6, 1, 2, 2047, 2048)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parallel(self):
+        """same results as the serial sweep, known results are skipped and all
+        results are committed in the order of the sweep
+
+        """
+        keys = [run_tests.result_key(gpn.parameter_dict(parameter_tuple))
+                for parameter_tuple in self.sweep]
+        known = keys[4]
+
+        for batch in [None, 4]:
+            self.args.batch = batch
+
+            with ResultsStore(self.path / "serial{}".format(batch)) as store:
+                run_tests.run_serial(self.args, self.sweep, store,
+                                     run_tests.sequence_test)
+                serial = dict(store.items())
+
+            with ResultsStore(self.path / "parallel{}".format(batch)) as store, \
+                 SweepExecutor(2) as executor:
+                store.put(known, "known")
+                run_tests.run_parallel(self.args, self.sweep, store,
+                                       executor)
+                parallel = list(store.items())
+
+            self.assertEqual([key for key, res in parallel],
+                             [known] + keys[:4] + keys[5:])
+            self.assertEqual(parallel[0][1], "known")
+            for key, res in parallel[1:]:
+                self.assertEqual(res, serial[key])
+
+            # parameter sets from the prefilter are among them
+            self.assertIn(run_tests.NOT_RUN,
+                          [res["monobit"] for key, res in parallel[1:]])
+
+    def test_screened(self):
+        """the screened spectral test results don't end up in the cache
+
+        """
+        self.args.batch = 4
+        self.args.spectral_screen = True
+        self.args.prefilter = False
+
+        sweep = gpn.parameter_sweep(1, 5, 8, 1, 1, 4099, 4099)
+        spectral_cache = SpectralCache(self.path / "spectral_cache")
+
+        with ResultsStore(self.path / "screened") as store, \
+             SweepExecutor(2) as executor:
+            run_tests.run_parallel(self.args, sweep, store, executor,
+                                   spectral_cache)
+            screened = [res["spectral"] for key, res in store.items()]
+
+        self.assertTrue(all(spectral.get("screened")
+                            for spectral in screened))
+
+        # a later sweep without screening gets the full results
+        self.args.batch = None
+        self.args.spectral_screen = False
+
+        sweep = gpn.parameter_sweep(1, 5, 8, 3, 3, 4099, 4099)
+        with ResultsStore(self.path / "full") as store:
+            run_tests.run_serial(self.args, sweep, store,
+                                 run_tests.sequence_test,
+                                 spectral_cache=spectral_cache)
+            for key, res in store.items():
+                self.assertEqual(res["spectral"], st.spectral_test(
+                    gpn.parameter_dict(key), 5))
+
+        spectral_cache.close()
+
+class Test_Prefilter(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def prefilter(self, parameters):
+        return run_tests.prefilter_parameters(
+            parameters, run_tests.sequence_period(parameters))
+
+    def test_short_period(self):
+        """only parameter sets with a too short period are not tested
+
+        """
+        # 2 has order 11 mod 2047 = 23 * 89
+        res = self.prefilter({"x0": 1, "a": 2, "c": 0, "m": 2047})
+        self.assertEqual(res["period"], 11)
+        for test in run_tests.STATISTICAL_TESTS + ["spectral"]:
+            self.assertEqual(res[test], run_tests.NOT_RUN)
+
+        # x -> 2*x + 1 ends in the fixed point 2047
+        res = self.prefilter({"x0": 1, "a": 2, "c": 1, "m": 2048})
+        self.assertEqual(res["period"], 1)
+
+        # full period
+        self.assertIsNone(self.prefilter({"x0": 1, "a": 5, "c": 1,
+                                          "m": 2048}))
+
+    def test_big_modulus(self):
+        """the cycle detection stops at the numbers of a sequence
+
+        """
+        res = self.prefilter({"x0": 1, "a": 2**69 + 1, "c": 0, "m": 2**70})
+        self.assertEqual(res["period"], 2)
+
+        # 2**60 + 1 has order 2**10 mod 2**70, more than the 286 numbers of
+        # 70 bits in a sequence
+        parameters = {"x0": 1, "a": 2**60 + 1, "c": 0, "m": 2**70}
+        self.assertEqual(nt.period(1, 2**60 + 1, 0, 2**70), 2**10)
+        self.assertIsNone(run_tests.sequence_period(parameters))
+        self.assertIsNone(self.prefilter(parameters))
+
+class Test_Blocks(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp_dir.name) / "bits"
+
+        # a random block, a block of zeros and a random block with some bits
+        # left over
+        rng = np.random.default_rng(25)
+        bits = np.concatenate([rng.integers(0, 2, size=20000),
+                               np.zeros(20000, dtype=np.int64),
+                               rng.integers(0, 2, size=25000)])
+        self.path.write_text("".join(map(str, bits)))
+
+        self.args = argparse.Namespace(
+            input=str(self.path), block_step=20000, poker_width=4,
+            plot_ac=False, fused=False, fail_fast=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_blocks(self):
+        """every whole block is tested, the block of zeros fails
+
+        """
+        with SweepExecutor() as executor:
+            summary = run_tests.run_blocks(self.args, executor)
+
+        self.assertEqual(summary["blocks"], 3)
+        self.assertEqual(summary["all"], (2, 0))
+        self.assertEqual(summary["monobit"], (2, 0))
+
+    def test_overlap(self):
+        """overlapping blocks, with fail-fast the other tests of the block of
+        zeros are not run
+
+        """
+        self.args.block_step = 5000
+        self.args.fail_fast = True
+
+        with SweepExecutor(2) as executor:
+            summary = run_tests.run_blocks(self.args, executor)
+
+        # every block from 5000 to 35000 has at least 5000 zeros
+        self.assertEqual(summary["blocks"], 10)
+        self.assertEqual(summary["all"][0], 3)
+        self.assertEqual(summary["monobit"], (3, 0))
+        self.assertEqual(summary["poker"], (3, 7))
+
+    def test_short(self):
+        """a file with less than one block has no summary
+
+        """
+        self.path.write_text("01" * 9999)
+
+        with SweepExecutor() as executor:
+            self.assertIsNone(run_tests.run_blocks(self.args, executor))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
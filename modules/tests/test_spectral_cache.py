@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Unittests for the spectral test cache.
+
+"""
+import unittest
+import pathlib
+import tempfile
+
+try:
+    from modules.spectral_cache import SpectralCache
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    from modules.spectral_cache import SpectralCache
+
+from util.logging.logger import CoreLog as cl
+
+from modules.executor import SweepExecutor
+import modules.special_test_spectral as st
+import modules.special_test_spectral_lll as lll
+
+class Test_SpectralCache(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp_dir.name) / "spectral_cache.sqlite"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_submit(self):
+        """only the first parameter set with a and m runs the spectral test
+
+        """
+        executor = SweepExecutor()
+
+        with SpectralCache(self.path) as cache:
+            for c in range(4):
+                params = {"x0": 1, "a": 65539, "c": c, "m": 2**31}
+                res = cache.submit(executor, params, 5).get()
+                self.assertEqual(res, st.spectral_test(params, 5))
+
+            self.assertEqual(cache.misses, 1)
+            self.assertEqual(cache.memory_hits, 3)
+            self.assertEqual(executor.task_count, 1)
+
+        # the results are still there after reopening
+        with SpectralCache(self.path) as cache:
+            params = {"x0": 7, "a": 65539, "c": 0, "m": 2**31}
+            res = cache.submit(executor, params, 5).get()
+            self.assertEqual(res, st.spectral_test(params, 5))
+
+            self.assertEqual(cache.disk_hits, 1)
+            self.assertEqual(executor.task_count, 1)
+
+            # m - a has the same results
+            params = {"x0": 1, "a": 2**31 - 65539, "c": 0, "m": 2**31}
+            res = cache.submit(executor, params, 5).get()
+            self.assertEqual(res, st.spectral_test(params, 5))
+            self.assertEqual(executor.task_count, 1)
+
+            # other dimensions are cached separately
+            self.assertIsNone(cache.get(
+                SpectralCache.key({"a": 65539, "m": 2**31}, 3)))
+
+    def test_not_exact(self):
+        """results that are only upper bounds are not cached
+
+        """
+        executor = SweepExecutor()
+        params = {"x0": 1, "a": 6364136223846793005, "c": 1, "m": 2**64}
+
+        with SpectralCache() as cache:
+            res = cache.submit(executor, params, 30, lll.spectral_test,
+                               (0.0,)).get()
+            self.assertFalse(res["exact"])
+            self.assertIsNone(cache.get(SpectralCache.key(params, 30)))
+
+            res = cache.submit(executor, params, 8, lll.spectral_test,
+                               (None,)).get()
+            self.assertTrue(res["exact"])
+            self.assertEqual(cache.get(SpectralCache.key(params, 8)), res)
+
+    def test_screened(self):
+        """results of the two-dimensional screen are not cached
+
+        """
+        self.assertFalse(SpectralCache.cacheable(st.v2_results(2**20)))
+        self.assertTrue(SpectralCache.cacheable(
+            st.spectral_test({"x0": 1, "a": 5, "c": 1, "m": 4099}, 5)))
+
+    def test_lru(self):
+        """the least recently used results are dropped from memory first
+
+        """
+        cache = SpectralCache(size=2)
+
+        cache.put((1, 11, 5), "a")
+        cache.put((2, 11, 5), "b")
+        self.assertEqual(cache.get((1, 11, 5)), "a")
+
+        cache.put((3, 11, 5), "c")
+
+        self.assertNotIn((2, 11, 5), cache)
+        self.assertEqual(cache.get((1, 11, 5)), "a")
+        self.assertEqual(cache.get((3, 11, 5)), "c")
+
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
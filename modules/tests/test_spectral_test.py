@@ -15,6 +15,8 @@ except ImportError:
 
 from util.logging.logger import CoreLog as cl
 
+import itertools
+
 
 class Test_GenParametersAndNumbers(unittest.TestCase):
 
@@ -69,6 +71,108 @@ class Test_GenParametersAndNumbers(unittest.TestCase):
         self.assertAlmostEqual(v2, 67654.37748, 5)
         self.assertAlmostEqual(v3,  1017.21089, 5)
 
+    def test_brute_force(self):
+        """compare with a brute force search for small moduli
+
+        """
+        T = 4
+
+        for m in range(3, 13):
+            for a in range(1, m):
+                params = {"x0": 1, "a": a, "c": 0, "m": m}
+                spectral = st.SpectralTest(params, T=T)
+
+                for t in range(2, T+1):
+                    # shortest non-zero s with s1 + a*s2 + ... = 0 mod m,
+                    # no component of it is longer than m
+                    best = m*m
+                    for s in itertools.product(range(-m, m+1), repeat=t-1):
+                        rest = sum(si * pow(a, i+1, m) for i, si in enumerate(s))
+                        s1 = (-rest) % m
+                        for first in [s1, s1 - m]:
+                            distsq = first*first + sum(si*si for si in s)
+                            if distsq > 0:
+                                best = min(best, distsq)
+
+                    self.assertEqual(spectral.nu_squared[t], best)
+
+    def test_big_modulus(self):
+        """exact results for moduli beyond 64 bits
+
+        """
+        params = {"x0": 1, "a": 6364136223846793005, "c": 1, "m": 2**64}
+        spectral = st.SpectralTest(params, T=6)
+
+        # every nu_t^2 is the squared length of a vector of the dual lattice
+        for t in range(2, 7):
+            self.assertIsInstance(spectral.nu_squared[t], int)
+            self.assertGreater(spectral.nu_squared[t], 0)
+
+        # v2 from a Gauss reduction of the basis (m, 0), (-a, 1)
+        b1 = (params["m"], 0)
+        b2 = (-params["a"], 1)
+        norm = lambda b: b[0]*b[0] + b[1]*b[1]
+        while True:
+            if norm(b2) < norm(b1):
+                b1, b2 = b2, b1
+            q = round((b1[0]*b2[0] + b1[1]*b2[1]) / norm(b1))
+            if q == 0:
+                break
+            b2 = (b2[0] - q*b1[0], b2[1] - q*b1[1])
+        self.assertEqual(spectral.nu_squared[2], norm(b1))
+
+        params = {"x0": 1, "a": 2**64 + 13, "c": 1, "m": 2**80 - 65}
+        res = st.SpectralTest(params, T=5).get_results()
+        self.assertEqual(len([key for key in res if key.startswith("v")]), 4)
+
+    def test_canonical_multiplier(self):
+        """multipliers with the same results
+
+        """
+        for m, a in [(2**31 - 1, 16807), (2**31, 65539), (10**10, 3141592621),
+                     (2**64, 6364136223846793005), (1000, 250)]:
+            canonical = st.canonical_multiplier(a, m)
+
+            equivalent = [a, m - a]
+            try:
+                inverse = pow(a, -1, m)
+                equivalent += [inverse, m - inverse]
+            except ValueError:
+                pass
+
+            nu_squared = st.SpectralTest(
+                {"x0": 1, "a": canonical, "c": 0, "m": m}, T=5).nu_squared
+
+            for b in equivalent:
+                self.assertEqual(st.canonical_multiplier(b, m), canonical)
+                self.assertLessEqual(canonical, b)
+
+                spectral = st.SpectralTest({"x0": 1, "a": b, "c": 0, "m": m},
+                                           T=5)
+                self.assertEqual(spectral.nu_squared, nu_squared)
+
+    def test_v2_batch(self):
+        """v2 for many multipliers at once
+
+        """
+        for m in [1000, 2**31 - 1, 2**31, 2**64]:
+            a_list = [0, 1, 2, m // 2, m - 1] + [
+                (i * 2862933555777941757 + 12345) % m for i in range(200)
+            ]
+
+            nu2_squared = st.spectral_v2_batch(a_list, m)
+
+            for a, s in zip(a_list, nu2_squared):
+                spectral = st.SpectralTest({"x0": 1, "a": a, "c": 0, "m": m},
+                                           T=2)
+                self.assertEqual(int(s), spectral.nu_squared[2])
+
+        res = st.v2_results(2**20, T=5)
+        self.assertEqual(res["v2"], {"value": 2**10, "pass": False})
+        self.assertEqual(res["v5"], {"value": None, "pass": False})
+        self.assertFalse(res["all_passed"])
+        self.assertTrue(res["screened"])
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
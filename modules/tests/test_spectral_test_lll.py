@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unittests for the spectral test with LLL reduction.
+
+"""
+import unittest
+import random
+
+try:
+    import modules.special_test_spectral_lll as lll
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.special_test_spectral_lll as lll
+
+from util.logging.logger import CoreLog as cl
+
+import modules.special_test_spectral as st
+
+class Test_LLLSpectralTest(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def test_small_moduli(self):
+        """same v_t as Knuth's search for all multipliers of small moduli
+
+        """
+        for m in range(3, 40):
+            for a in range(m):
+                params = {"x0": 1, "a": a, "c": 0, "m": m}
+
+                self.assertEqual(
+                    lll.LLLSpectralTest(params, T=5).nu_squared[2:],
+                    st.SpectralTest(params, T=5).nu_squared[2:])
+
+    def test_big_moduli(self):
+        """same v_t as Knuth's search for random multipliers of big moduli
+
+        """
+        rng = random.Random(19)
+
+        for m in [2**31 - 1, 2**32, 10**10, 2**64]:
+            for _ in range(10):
+                params = {"x0": 1, "a": rng.randrange(1, m), "c": 1, "m": m}
+
+                self.assertEqual(
+                    lll.LLLSpectralTest(params, T=6).nu_squared[2:],
+                    st.SpectralTest(params, T=6).nu_squared[2:])
+
+    def test_lll_reduce(self):
+        """the reduced basis spans the same lattice and is size reduced
+
+        """
+        a, m, t = 6364136223846793005, 2**64, 8
+        basis = lll.dual_basis(a, m, t)
+        d, lam = lll.lll_reduce(basis)
+
+        for vector in basis:
+            # s_1 + a*s_2 + ... + a^(t-1)*s_t = 0 mod m
+            self.assertEqual(
+                sum(s * pow(a, i, m) for i, s in enumerate(vector)) % m, 0)
+
+        for k in range(t):
+            for j in range(k):
+                self.assertLessEqual(2 * abs(lam[k][j]), d[j+1])
+
+    def test_many_dimensions(self):
+        """sixteen dimensions in the format of SpectralTest.get_results()
+
+        """
+        params = {"x0": 1, "a": 6364136223846793005, "c": 1, "m": 2**64}
+        res = lll.spectral_test(params, T=16)
+
+        self.assertEqual(set(res),
+                         {"v{}".format(t) for t in range(2, 17)}
+                         | {"all_passed", "exact"})
+        self.assertTrue(res["exact"])
+
+        for t in range(2, 17):
+            self.assertEqual(res["v{}".format(t)]["pass"],
+                             res["v{}".format(t)]["value"] > 2**(30/t))
+
+    def test_time_budget(self):
+        """without time the results are upper bounds and marked as not exact
+
+        """
+        params = {"x0": 1, "a": 6364136223846793005, "c": 1, "m": 2**64}
+        test = lll.LLLSpectralTest(params, T=30, time_budget=0.0)
+
+        self.assertFalse(test.get_results()["exact"])
+        self.assertFalse(all(test.exact[2:]))
+
+        exact = lll.LLLSpectralTest(params, T=30)
+        for t in range(2, 31):
+            self.assertGreaterEqual(test.nu_squared[t], exact.nu_squared[t])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
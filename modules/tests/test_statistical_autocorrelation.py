@@ -35,5 +35,21 @@ class Test_StatisticalAutocorrelation(unittest.TestCase):
 
         ac.autocorrelation_passed(binary_sequence)
 
+    def test_ac_all(self):
+        """autocorrelation for all shifts at once
+
+        """
+        parameters = gpn.gen_params()
+        parameters["m"] = 2**31 - 1
+        nums = gpn.gen_nums(parameters)
+        binary_sequence = gpn.gen_bit_sequence(nums, modulus=parameters["m"])
+        bits = binary_sequence.bits()
+
+        res = ac.autocorrelation_all(binary_sequence)
+        self.assertEqual(len(res), 4999)
+
+        for tau in [1, 2, 3, 100, 2500, 4998, 4999]:
+            self.assertEqual(res[tau - 1], ac.autocorrelate_tau(bits, tau))
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
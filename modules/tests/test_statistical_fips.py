@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unittests for the fused FIPS 140-1 tests.
+
+"""
+import unittest
+
+import numpy as np
+
+try:
+    import modules.statistical_test_fips as fips
+except ImportError:
+    import sys
+    sys.path.append("../..")
+    import modules.statistical_test_fips as fips
+
+from util.logging.logger import CoreLog as cl
+
+import modules.gen_parameters_and_numbers as gpn
+import modules.statistical_test_monobit as monobit
+import modules.statistical_test_poker as poker
+import modules.statistical_test_runs as runs
+
+from modules.bit_sequence import BitSequence
+
+class Test_StatisticalFIPS(unittest.TestCase):
+
+    def setUp(self):
+        cl("debug")
+
+    def tearDown(self):
+        pass
+
+    def test_fips_same_as_single_tests(self):
+        """fused tests give the same verdicts as the single tests
+
+        """
+        parameter_list = [
+            (1, 1103515245, 12345, 2**31 - 1),
+            (1, 65539, 0, 2**31),
+            (1, 33, 0, 251),
+            (1, 5, 3, 2**11),
+        ]
+
+        for x0, a, c, m in parameter_list:
+            parameters = {"x0": x0, "a": a, "c": c, "m": m}
+            nums = gpn.gen_nums(parameters)
+            binary_sequence = gpn.gen_bit_sequence(nums, modulus=m)
+
+            res = fips.fips_passed(binary_sequence)
+
+            self.assertEqual(res["monobit"],
+                             monobit.monobit_passed(binary_sequence))
+            self.assertEqual(res["poker"],
+                             poker.poker_passed(binary_sequence))
+            self.assertEqual(res["runs"],
+                             runs.runs_passed(binary_sequence))
+            self.assertEqual(res["long_runs"],
+                             runs.long_runs_passed(binary_sequence))
+
+            longest = runs.longest_runs(binary_sequence)
+            self.assertEqual(
+                (res["longest_runs"]["zeros"], res["longest_runs"]["ones"]),
+                longest)
+
+    def test_statistics_same_as_single(self):
+        """the lookup tables give the same statistics as the single tests
+
+        """
+        rng = np.random.default_rng(9)
+        sequences = [
+            rng.integers(0, 2, size=20000),
+            rng.random(20000) < 0.9,
+            rng.random(20000) < 0.05,
+            np.zeros(20000),
+            np.ones(800),
+            np.tile([1, 1, 0, 0, 0, 1, 0, 1], 100),
+            rng.integers(0, 2, size=19999),
+        ]
+
+        for bits in sequences:
+            binary_sequence = BitSequence.from_bits(bits.astype(np.uint8))
+
+            for poker_width in [4, 5, 8]:
+                res = fips.fips_statistics(binary_sequence, poker_width)
+                single = fips._single_statistics(binary_sequence, poker_width)
+
+                self.assertEqual(res["ones"], single["ones"])
+                self.assertTrue(np.array_equal(res["poker"], single["poker"]))
+                self.assertTrue(np.array_equal(res["runs"], single["runs"]))
+                self.assertEqual(res["longest_runs"], single["longest_runs"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
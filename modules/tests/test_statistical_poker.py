@@ -16,6 +16,8 @@ from util.logging.logger import CoreLog as cl
 
 import modules.gen_parameters_and_numbers as gpn
 
+import numpy as np
+
 class Test_StatisticalPoker(unittest.TestCase):
 
     def setUp(self):
@@ -35,5 +37,31 @@ class Test_StatisticalPoker(unittest.TestCase):
 
         poker.poker_passed(binary_sequence)
 
+    def test_poker_counts(self):
+        """count blocks of every width against string slices
+
+        """
+        parameters = gpn.gen_params()
+        parameters["m"] = 2**31 - 1
+        nums = gpn.gen_nums(parameters)
+        bin_nums = gpn.gen_binary_nums(nums, modulus=parameters["m"])
+        binary_sequence = gpn.gen_binary_sequence(bin_nums)
+
+        for m in range(4, 17):
+            k = len(binary_sequence) // m
+            expected = np.zeros(2**m, dtype=int)
+            for j in range(k):
+                expected[int(binary_sequence[m*j:m*j+m], 2)] += 1
+
+            f = poker.poker_counts(binary_sequence, m)
+            self.assertEqual(f.tolist(), expected.tolist())
+
+        # long sequences for the wide variants
+        self.assertTrue(poker.poker_passed(binary_sequence, 4))
+        self.assertTrue(poker.poker_passed(binary_sequence, 6))
+
+        with self.assertRaises(ValueError):
+            poker.poker_passed(binary_sequence, 3)
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
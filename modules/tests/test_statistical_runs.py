@@ -49,6 +49,51 @@ class Test_StatisticalRuns(unittest.TestCase):
         self.assertEqual(zero_count, 1)
         self.assertEqual(one_count, 1)
 
+    def test_histogram(self):
+        """run-length histogram against counting substrings
+
+        """
+        parameters = gpn.gen_params()
+        nums = gpn.gen_nums(parameters)
+        bin_nums = gpn.gen_binary_nums(nums, modulus=parameters["m"])
+        binary_sequence = gpn.gen_binary_sequence(bin_nums, length=3000)
+
+        histogram = runs.runs_histogram(binary_sequence)
+
+        for length in range(1, 12):
+            zeros = "1{}1".format("0" * length)
+            ones = "0{}0".format("1" * length)
+            zero_count = 0
+            one_count = 0
+            for i in range(len(binary_sequence)):
+                if binary_sequence.startswith(zeros, i):
+                    zero_count += 1
+                if binary_sequence.startswith(ones, i):
+                    one_count += 1
+            self.assertEqual(histogram[0, length], zero_count)
+            self.assertEqual(histogram[1, length], one_count)
+
+    def test_run_lengths(self):
+        """run-length encoding
+
+        """
+        values, lengths = runs.run_lengths("0001101111")
+        self.assertEqual(values.tolist(), [0, 1, 0, 1])
+        self.assertEqual(lengths.tolist(), [3, 2, 1, 4])
+
+    def test_longest_runs(self):
+        """longest runs, including the first and the last run
+
+        """
+        longest = runs.longest_runs("0000110111000")
+        self.assertEqual(longest, (4, 3))
+
+        longest = runs.longest_runs("1" * 40)
+        self.assertEqual(longest, (0, 40))
+
+        self.assertFalse(runs.long_runs_passed("01" * 100 + "0" * 34))
+        self.assertTrue(runs.long_runs_passed("01" * 100 + "0" * 33 + "1"))
+
     def test_runs_test(self):
         """test the runs test
 
@@ -17,6 +17,9 @@ from matplotlib import pyplot as plt
 from util.logging.logger import CoreLog as cl
 from util.opt.greet import ngreeting
 
+from modules.results_store import ResultsStore
+from modules.run_tests import NOT_RUN, STATISTICAL_TESTS
+
 def parse_arguments():
     """
     Parse the command line arguments.
@@ -65,7 +68,10 @@ def greet():
 
 def parse_input(input_file):
     """
-    Unpickle the input file.
+    Load the results from the input file.
+
+    Results files from older versions are pickled dictionaries, newer ones are
+    SQLite databases.
 
     """
     # see what we have to expect from this input file
@@ -105,8 +111,12 @@ def parse_input(input_file):
 
     return_dict = dict()
 
-    with open(input_file, "rb") as ifile:
-        input_data = pickle.load(ifile)
+    if input_file.endswith(".pickle"):
+        with open(input_file, "rb") as ifile:
+            input_data = pickle.load(ifile)
+    else:
+        with ResultsStore(input_file) as store:
+            input_data = store.to_nested_dict()
 
     cl.debug("Loaded dictionary from file")
 
@@ -131,20 +141,23 @@ def eval_pass(result_dict):
     """
     Evaluate the passing of a test run.
 
+    Tests that were not run (fail-fast mode) don't count as passed, if the
+    spectral test was not run its number of passes is None. Missing dimensions
+    of the spectral test don't count as passed either.
+
     """
-    mono_pass = result_dict["monobit"]
-    poker_pass = result_dict["poker"]
-    runs_pass = result_dict["runs"]
-    longruns_pass = result_dict["long_runs"]
-    auto_pass = result_dict["autocorrelation"]
+    stat_passes = 0
+    for test in STATISTICAL_TESTS:
+        if result_dict[test] != NOT_RUN:
+            stat_passes += bool(result_dict[test])
 
-    sv2_pass = result_dict["spectral"]["v2"]["pass"]
-    sv3_pass = result_dict["spectral"]["v3"]["pass"]
-    sv4_pass = result_dict["spectral"]["v4"]["pass"]
-    sv5_pass = result_dict["spectral"]["v5"]["pass"]
+    spectral = result_dict["spectral"]
+    if spectral == NOT_RUN:
+        return stat_passes, None
 
-    stat_passes = mono_pass + poker_pass + runs_pass + longruns_pass + auto_pass
-    spectral_passes = sv2_pass + sv3_pass + sv4_pass + sv5_pass
+    spectral_passes = 0
+    for t in range(2, 6):
+        spectral_passes += spectral.get("v{}".format(t), {}).get("pass", False)
 
     return stat_passes, spectral_passes
 
@@ -241,6 +254,10 @@ def main():
                 stat_passes, spectral_passes = eval_pass(
                     input_data["input_data"][x0][x][y][m])
 
+            # the spectral test was skipped in fail-fast mode
+            if spectral_passes is None:
+                spectral_passes = -1
+
             stat_res[j, i] = stat_passes
             spect_res[j, i] = spectral_passes
             if (stat_passes == 5):
@@ -249,8 +266,9 @@ def main():
                 spect_if_stat_res[j, i] = -1
 
 
-    # mask the spect_if_stat array
+    # mask the spect_if_stat array and the skipped spectral tests
     spect_if_stat_res = np.ma.masked_where(spect_if_stat_res == -1, spect_if_stat_res)
+    spect_res = np.ma.masked_where(spect_res == -1, spect_res)
 
 
     # statistical plot